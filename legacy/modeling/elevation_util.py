@@ -6,11 +6,43 @@ Author: fei.zhang@ga.gov.au
 
 Date:
 """
+from __future__ import print_function
+
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
 
 import numpy as np
 import scipy.interpolate as spi
 
 import mtpy.utils.gis_tools
+from mtpy.utils.numba_utils import compile_kernel, prange
+
+
+def _fill_elevation_columns(elevation_model, interp_elev, sea_level_index,
+                            elevation_cell, elev_max, res_air, res_sea,
+                            fill_res):
+    """
+    fill each elevation model column with air, sea and fill_res in place.
+    """
+    for nn in prange(interp_elev.shape[0]):
+        for ee in range(interp_elev.shape[1]):
+            elevation_model[nn, ee, :] = fill_res
+            # need to test for ocean
+            if interp_elev[nn, ee] < 0:
+                # fill in from bottom to sea level, then rest with air
+                elevation_model[nn, ee, 0:sea_level_index] = res_air
+                dz = sea_level_index + \
+                     abs(int(interp_elev[nn, ee] / elevation_cell)) + 1
+                elevation_model[nn, ee, sea_level_index:dz] = res_sea
+            else:
+                dz = int((elev_max - interp_elev[nn, ee]) / elevation_cell)
+                elevation_model[nn, ee, 0:dz] = res_air
+
+
+_fill_elevation_columns_kernel = compile_kernel(_fill_elevation_columns)
+# loading the compiled kernel takes ~0.1 s, below this many model cells the
+# numpy fill is faster
+_FILL_KERNEL_MIN_CELLS = 10000000
 
 
 # ==============================================================================
@@ -37,21 +69,25 @@ def read_surface_ascii(ascii_fn):
     |
     S
     """
-    dfid = file(ascii_fn, 'r')
     d_dict = {}
-    skiprows = 0
-    for ii in range(6):
-        dline = dfid.readline()
-        dline = dline.strip().split()
-        key = dline[0].strip().lower()
-        value = float(dline[1].strip())
-        d_dict[key] = value
-        # check if key is an integer
-        try:
-            int(key)
-        except:
-            skiprows += 1
-    dfid.close()
+    # the NODATA_value line is optional, so keep any data line read
+    # while looking for the header
+    data_lines = []
+    with open(ascii_fn, 'r') as dfid:
+        for ii in range(6):
+            dline = dfid.readline()
+            dlist = dline.strip().split()
+            key = dlist[0].strip().lower()
+            value = float(dlist[1].strip())
+            d_dict[key] = value
+            # check if key is an integer
+            try:
+                int(key)
+            except ValueError:
+                continue
+            data_lines.append(dline)
+        # parse the rest of the file in one go rather than line by line
+        data_lines.append(dfid.read())
 
     x0 = d_dict['xllcorner']
     y0 = d_dict['yllcorner']
@@ -59,11 +95,9 @@ def read_surface_ascii(ascii_fn):
     ny = int(d_dict['nrows'])
     cs = d_dict['cellsize']
 
-    elevation = np.loadtxt(ascii_fn, skiprows=skiprows)[::-1]  # ::-1 reverse an axis to put the southern line first
+    elevation = np.fromstring(''.join(data_lines), sep=' ', dtype=np.float32).reshape(ny, nx)[::-1]  # ::-1 reverse an axis to put the southern line first
 
     # create lat and lon arrays from the dem file
-    lon = np.arange(x0, x0 + cs * (nx), cs)
-    lat = np.arange(y0, y0 + cs * (ny), cs)
     lon = np.linspace(x0, x0 + cs * (nx - 1), nx)
     lat = np.linspace(y0, y0 + cs * (ny - 1), ny)
 
@@ -92,14 +126,16 @@ def read_dem_ascii(ascii_fn, cell_size=500, model_center=(0, 0), rot_90=0, epsg=
     V
     S
     """
-    dfid = file(ascii_fn, 'r')
     d_dict = {}
-    for ii in range(6):
-        dline = dfid.readline()
-        dline = dline.strip().split()
-        key = dline[0].strip().lower()
-        value = float(dline[1].strip())
-        d_dict[key] = value
+    with open(ascii_fn, 'r') as dfid:
+        for ii in range(6):
+            dline = dfid.readline()
+            dline = dline.strip().split()
+            key = dline[0].strip().lower()
+            value = float(dline[1].strip())
+            d_dict[key] = value
+        # the rest of the file is the elevation data, parse it in one go
+        dem_str = dfid.read()
 
     x0 = d_dict['xllcorner']
     y0 = d_dict['yllcorner']
@@ -107,22 +143,14 @@ def read_dem_ascii(ascii_fn, cell_size=500, model_center=(0, 0), rot_90=0, epsg=
     ny = int(d_dict['nrows'])
     cs = d_dict['cellsize']
 
-    # read in the elevation data
-    elevation = np.zeros((nx, ny))
-
-    for ii in range(1, int(ny) + 2):
-        dline = dfid.readline()
-        if len(str(dline)) > 1:
-            # needs to be backwards because first line is the furthest north
-            # row.
-            elevation[
-            :, -ii] = np.array(dline.strip().split(' '), dtype='float')
-        else:
-            break
+    # read in the elevation data, needs to be backwards because first line
+    # is the furthest north row, then transpose so x is east.
+    elevation = np.fromstring(dem_str, sep=' ', dtype=np.float32).reshape(ny, nx)[::-1].T
 
-    # create lat and lon arrays from the dem fle
-    lon = np.arange(x0, x0 + cs * (nx), cs)
-    lat = np.arange(y0, y0 + cs * (ny), cs)
+    # create lat and lon arrays from the dem fle, linspace guarantees nx and
+    # ny points where arange can gain one from round off
+    lon = np.linspace(x0, x0 + cs * (nx - 1), nx)
+    lat = np.linspace(y0, y0 + cs * (ny - 1), ny)
 
     # calculate the lower left and uper right corners of the grid in meters
     ll_en = mtpy.utils.gis_tools.ll_to_utm(23, lat[0], lon[0])
@@ -138,21 +166,13 @@ def read_dem_ascii(ascii_fn, cell_size=500, model_center=(0, 0), rot_90=0, epsg=
     num_cells = max([1, int(cell_size / np.mean([d_east, d_north]))])
 
     # make easting and northing arrays in meters corresponding to lat and lon
-    east = np.arange(ll_en[1], ur_en[1], d_east)
-    north = np.arange(ll_en[2], ur_en[2], d_north)
-
-    # resample the data accordingly
-    new_east = east[np.arange(0, east.shape[0], num_cells)]
-    new_north = north[np.arange(0, north.shape[0], num_cells)]
-
-    try:
-        new_x, new_y = np.meshgrid(np.arange(0, east.shape[0], num_cells),
-                                   np.arange(0, north.shape[0], num_cells),
-                                   indexing='ij')
-    except TypeError:
-        new_x, new_y = [arr.T for arr in np.meshgrid(np.arange(0, east.shape[0], num_cells),
-                                                     np.arange(0, north.shape[0], num_cells))]
-    elevation = elevation[new_x, new_y]
+    east = np.linspace(ll_en[1], ur_en[1], nx, endpoint=False)
+    north = np.linspace(ll_en[2], ur_en[2], ny, endpoint=False)
+
+    # resample the data accordingly, every num_cells point is a plain slice
+    new_east = east[::num_cells]
+    new_north = north[::num_cells]
+    elevation = elevation[::num_cells, ::num_cells]
 
     # estimate the shift of the DEM to relative model coordinates
     shift_east = new_east.mean() - model_center[0]
@@ -174,7 +194,7 @@ def read_dem_ascii(ascii_fn, cell_size=500, model_center=(0, 0), rot_90=0, epsg=
 
 
 def interpolate_elevation(elev_east, elev_north, elevation, model_east,
-                          model_north, pad=3):
+                          model_north, pad=3, n_threads=None):
     """
     interpolate the elevation onto the model grid.
 
@@ -205,6 +225,10 @@ def interpolate_elevation(elev_east, elev_north, elevation, model_east,
                 to the resistivity model cause most elevation models will
                 not cover the entire area.
 
+        *n_threads* : int
+                      number of threads to interpolate large model grids
+                      with.  *Default* is None, which uses every cpu.
+
     Returns:
     --------------
 
@@ -213,26 +237,40 @@ def interpolate_elevation(elev_east, elev_north, elevation, model_east,
                         model grid.
 
     """
-    # need to line up the elevation with the model
-    grid_east, grid_north = np.broadcast_arrays(elev_east[:, None],
-                                                elev_north[None, :])
-    # interpolate onto the model grid
-    interp_elev = spi.griddata((grid_east.ravel(), grid_north.ravel()),
-                               elevation.ravel(),
-                               (model_east[:, None],
-                                model_north[None, :]),
-                               method='linear',
-                               fill_value=elevation.mean())
-
-    interp_elev[0:pad, pad:-pad] = interp_elev[pad, pad:-pad]
-    interp_elev[-pad:, pad:-pad] = interp_elev[-pad - 1, pad:-pad]
-    interp_elev[:, 0:pad] = interp_elev[:, pad].repeat(pad).reshape(
-        interp_elev[:, 0:pad].shape)
-    interp_elev[:, -pad:] = interp_elev[:, -pad - 1].repeat(pad).reshape(
-        interp_elev[:, -pad:].shape)
-
-    # transpose the modeled elevation to align with x=N, y=E
-    interp_elev = interp_elev.T
+    # the elevation is already on a regular grid, so interpolate along the
+    # axes instead of triangulating every elevation point
+    elev_interp = spi.RegularGridInterpolator((elev_east, elev_north),
+                                              elevation,
+                                              method='linear',
+                                              bounds_error=False,
+                                              fill_value=elevation.mean())
+    # need to line up the model grid with the elevation, the outer pad
+    # cells are repeats so only the inner grid is interpolated.  Query
+    # north first so the result is already aligned with x=N, y=E
+    grid_north, grid_east = np.broadcast_arrays(
+        model_north[pad:model_north.shape[0] - pad, None],
+        model_east[None, pad:model_east.shape[0] - pad])
+    model_points = np.stack((grid_east, grid_north), axis=-1)
+
+    # interpolate onto the model grid, large grids are split into stripes of
+    # northings that are interpolated on separate threads, numpy releases the
+    # GIL for the array operations of the interpolation
+    if n_threads is None:
+        n_threads = cpu_count()
+    n_threads = min(n_threads, model_points.shape[0],
+                    grid_east.size // 50000 + 1)
+    if n_threads > 1:
+        pool = ThreadPool(n_threads)
+        try:
+            interp_elev = np.concatenate(
+                pool.map(elev_interp, np.array_split(model_points, n_threads)))
+        finally:
+            pool.close()
+    else:
+        interp_elev = elev_interp(model_points)
+
+    # repeat the edge of the interpolated elevation into the pad cells
+    interp_elev = np.pad(interp_elev, pad, mode='edge')
 
     return interp_elev
 
@@ -298,12 +336,12 @@ def make_elevation_model(interp_elev, model_nodes_z, elevation_cell=30,
     elev_min = max([0, interp_elev[pad:-pad, pad:-pad].min()])
 
     # scale the interpolated elevations to fit within elev_max, elev_min
-    interp_elev[np.where(interp_elev > elev_max)] = elev_max
+    np.minimum(interp_elev, elev_max, out=interp_elev)
     # interp_elev[np.where(interp_elev < elev_min)] = elev_min
 
     # calculate the number of elevation cells needed
     num_elev_cells = int((elev_max - elev_min) / elevation_cell)
-    print 'Number of elevation cells: {0}'.format(num_elev_cells)
+    print('Number of elevation cells: {0}'.format(num_elev_cells))
 
     # find sea level if it is there
     if elev_min < 0:
@@ -312,37 +350,48 @@ def make_elevation_model(interp_elev, model_nodes_z, elevation_cell=30,
     else:
         sea_level_index = num_elev_cells - 1
 
-    print 'Sea level index is {0}'.format(sea_level_index)
+    print('Sea level index is {0}'.format(sea_level_index))
 
     # make an array of just the elevation for the model
     # north is first index, east is second, vertical is third
-    elevation_model = np.ones((interp_elev.shape[0],
-                               interp_elev.shape[1],
-                               num_elev_cells + model_nodes_z.shape[0]))
-
-    elevation_model[:, :, :] = fill_res
+    # single precision is plenty for resistivity values and halves the
+    # memory of the largest array, every cell is written below so there is
+    # no need to initialise it
+    elevation_model = np.empty((interp_elev.shape[0],
+                                interp_elev.shape[1],
+                                num_elev_cells + model_nodes_z.shape[0]),
+                               dtype=np.float32)
 
     # fill in elevation model with air values.  Remeber Z is positive down, so
     # the top of the model is the highest point and index 0 is highest
     # elevation
-    for nn in range(interp_elev.shape[0]):
-        for ee in range(interp_elev.shape[1]):
-            # need to test for ocean
-            if interp_elev[nn, ee] < 0:
-                # fill in from bottom to sea level, then rest with air
-                elevation_model[nn, ee, 0:sea_level_index] = res_air
-                dz = sea_level_index + \
-                     abs(int((interp_elev[nn, ee]) / elevation_cell)) + 1
-                elevation_model[nn, ee, sea_level_index:dz] = res_sea
-            else:
-                dz = int((elev_max - interp_elev[nn, ee]) / elevation_cell)
-                elevation_model[nn, ee, 0:dz] = res_air
+    if _fill_elevation_columns_kernel is not None and \
+            elevation_model.size >= _FILL_KERNEL_MIN_CELLS:
+        _fill_elevation_columns_kernel(elevation_model, interp_elev, sea_level_index,
+                                       elevation_cell, elev_max, res_air, res_sea,
+                                       fill_res)
+    else:
+        # compare every vertical index against the number of air and sea
+        # cells of each column at once
+        z_index = np.arange(elevation_model.shape[2])
+        # need to test for ocean
+        ocean = interp_elev < 0
+        # over the ocean fill in from bottom to sea level, then rest with air
+        dz_air = np.where(ocean, sea_level_index,
+                          ((elev_max - interp_elev) / elevation_cell).astype(int))
+        dz_sea = sea_level_index + \
+                 np.abs((interp_elev / elevation_cell).astype(int)) + 1
+        sea_cells = (z_index >= sea_level_index) & (z_index < dz_sea[:, :, None])
+        sea_cells &= ocean[:, :, None]
+        # write air, sea and subsurface values in a single pass over the model
+        elevation_model[:, :, :] = np.where(z_index < dz_air[:, :, None], res_air,
+                                            np.where(sea_cells, res_sea, fill_res))
 
     # make new z nodes array
     new_nodes_z = np.append(np.repeat(elevation_cell, num_elev_cells),
                             model_nodes_z)
 
-    new_nodes_z[np.where(new_nodes_z < elevation_cell)] = elevation_cell
+    np.maximum(new_nodes_z, elevation_cell, out=new_nodes_z)
 
     return elevation_model, new_nodes_z
 
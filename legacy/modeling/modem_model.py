@@ -223,6 +223,10 @@ class Model(object):
         self.title = 'Model File written by MTpy.modeling.modem'
         self.res_scale = kwargs.pop('res_scale', 'loge')
 
+        # grids and surface index of the last model used by
+        # change_data_elevation, keyed by (model_fn, mtime, res_air)
+        self._surface_index_cache = {}
+
     def _reset_defaults_for_reading(self):
         """
         Reset all the defaults for input parameters prior to reading a model
@@ -1930,7 +1934,8 @@ class Model(object):
             np.savetxt(fname, data, fmt=fmt)
 
     def add_topography_to_model(self, dem_ascii_fn, model_fn, model_center=(0, 0),
-                                rot_90=0, cell_size=500, elev_cell=30):
+                                rot_90=0, cell_size=500, elev_cell=30,
+                                show_plots=False):
         """
         Add topography to an existing model from a dem in ascii format.
 
@@ -1974,6 +1979,10 @@ class Model(object):
                           vertical size of each elevation cell.  This value should
                           be about 1/10th the smalles skin depth.
 
+            *show_plots* : [ True | False ]
+                           plot the dem read in as a check.  *Default* is
+                           False
+
         Returns:
         ---------------
             *self.model_fn* : string
@@ -1984,8 +1993,9 @@ class Model(object):
         e_east, e_north, elevation = elev_util.read_dem_ascii(dem_ascii_fn, cell_size=cell_size,
                                                               model_center=model_center,
                                                               rot_90=3)
-        plt.figure()
-        plt.pcolormesh(e_east, e_north, elevation)
+        if show_plots:
+            plt.figure()
+            plt.pcolormesh(e_east, e_north, elevation)
         m_obj = Model()
         m_obj.read_model_file(model_fn)
         # 2.) interpolate the elevation model onto the model grid
@@ -1994,8 +2004,9 @@ class Model(object):
         # 3.) make a resistivity model that incoorporates topography
         mod_elev, elev_nodes_z = elev_util.make_elevation_model(m_elev, m_obj.nodes_z,
                                                                 elevation_cell=elev_cell)
-        plt.figure()
-        #    plt.pcolormesh(m_obj.grid_east, m_obj.grid_north,m_elev)
+        if show_plots:
+            plt.figure()
+            #    plt.pcolormesh(m_obj.grid_east, m_obj.grid_north,m_elev)
         # 4.) write new model file
         m_obj.nodes_z = elev_nodes_z
         m_obj.res_model = mod_elev
@@ -2031,19 +2042,39 @@ class Model(object):
         d_obj = Data()
         d_obj.read_data_file(data_fn)
 
-        m_obj = Model()
-        m_obj.read_model_file(model_fn)
-
-        for key in d_obj.mt_dict.keys():
-            mt_obj = d_obj.mt_dict[key]
-            e_index = np.where(m_obj.grid_east > mt_obj.grid_east)[0][0]
-            n_index = np.where(m_obj.grid_north > mt_obj.grid_north)[0][0]
-            z_index = np.where(
-                m_obj.res_model[n_index, e_index, :] < res_air * .9)[0][0]
-            s_index = np.where(d_obj.data_array['station'] == key)[0][0]
-            d_obj.data_array[s_index]['elev'] = m_obj.grid_z[z_index]
-
-            mt_obj.grid_elev = m_obj.grid_z[z_index]
+        # only read the model and rescan it for the surface if it changed
+        cache_key = (model_fn, os.path.getmtime(model_fn), res_air)
+        if cache_key not in self._surface_index_cache:
+            m_obj = Model()
+            m_obj.read_model_file(model_fn)
+
+            # index of the first cell below the air in every column of the model
+            surface_index = (m_obj.res_model < res_air * .9).argmax(axis=2)
+            self._surface_index_cache = {cache_key: (m_obj.grid_east,
+                                                     m_obj.grid_north,
+                                                     m_obj.grid_z,
+                                                     surface_index)}
+        grid_east, grid_north, grid_z, surface_index = \
+            self._surface_index_cache[cache_key]
+
+        # locate all stations at once, the grids are monotonic, so use a
+        # binary search for the first node past each station
+        keys = list(d_obj.mt_dict.keys())
+        station_east = np.array([d_obj.mt_dict[key].grid_east for key in keys])
+        station_north = np.array([d_obj.mt_dict[key].grid_north for key in keys])
+        e_index = np.searchsorted(grid_east, station_east, side='right')
+        n_index = np.searchsorted(grid_north, station_north, side='right')
+        station_elev = grid_z[surface_index[n_index, e_index]]
+
+        # first row of each station in the data array
+        station_index = {}
+        for ii, station in enumerate(d_obj.data_array['station']):
+            station_index.setdefault(station, ii)
+        s_index = [station_index[key] for key in keys]
+        d_obj.data_array['elev'][s_index] = station_elev
+
+        for key, elev in zip(keys, station_elev):
+            d_obj.mt_dict[key].grid_elev = elev
 
         if new_data_fn is None:
             new_dfn = '{0}{1}'.format(data_fn[:-4], '_elev.dat')
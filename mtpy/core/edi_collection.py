@@ -15,6 +15,7 @@ import os
 import sys
 
 from logging import INFO
+from multiprocessing.pool import ThreadPool
 
 import geopandas as gpd
 import matplotlib.pyplot as plt
@@ -25,10 +26,16 @@ from shapely.geometry import Point  # , Polygon, LineString, LinearRing
 import mtpy.core.mt as mt
 import mtpy.imaging.mtplottools as mtplottools
 from mtpy.utils.decorator import deprecated
+from mtpy.utils.filehandling import open_csv_file
 from mtpy.utils.matplotlib_utils import gen_hist_bins
 from mtpy.utils.mtpylog import MtPyLog
 import mtpy.analysis.pt as MTpt
 
+# buffer size of the csv files written, rows are flushed in large blocks
+CSV_BUFFER_SIZE = 1 << 20
+# maximum number of threads writing csv files at the same time
+MAX_CSV_WRITERS = 8
+
 def is_num_in_seq(anum, aseq, atol=0.0001):
     """
     check if anum is in a sequence by a small tolerance
@@ -95,6 +102,17 @@ class EdiCollection(object):
         else:
             self._logger.error("None Edi file set")
 
+        # sorted frequencies of each station with their original indices,
+        # frequencies near a given one are then found by bisection
+        self._sorted_freqs = []
+        for mt_obj in self.mt_obj_list:
+            freq_order = np.argsort(mt_obj.Z.freq, kind='mergesort')
+            self._sorted_freqs.append((np.asarray(mt_obj.Z.freq)[freq_order],
+                                       freq_order))
+
+        # phase tensor and tipper values of each station, see _get_station_pt_values
+        self._station_pt_values = None
+
         # get all frequencies from all edi files
         self.all_frequencies = None
         self.mt_periods = None
@@ -123,18 +141,16 @@ class EdiCollection(object):
             return
 
         # get all frequencies from all edi files
-        all_freqs = []
-        for mt_obj in self.mt_obj_list:
-            all_freqs.extend(list(mt_obj.Z.freq))
+        all_freqs = np.concatenate([np.asarray(mt_obj.Z.freq) for mt_obj in self.mt_obj_list])
 
-        self.mt_periods = 1.0 / np.array(all_freqs)
+        self.mt_periods = 1.0 / all_freqs
 
-        # sort all frequencies so that they are in ascending order,
-        # use set to remove repeats and make an array
-        self.all_frequencies = sorted(list(set(all_freqs)))
+        # np.unique removes repeats and sorts the frequencies in ascending order
+        unique_freqs = np.unique(all_freqs)
+        self.all_frequencies = list(unique_freqs)
 
         self._logger.debug("Number of MT Frequencies: %s", len(self.all_frequencies))
-        all_periods = 1.0 / np.array(sorted(self.all_frequencies, reverse=True))
+        all_periods = 1.0 / unique_freqs[::-1]
 
         self._logger.debug("Type of all_periods %s", type(all_periods))
         self._logger.info("Number of MT Periods: %s", len(all_periods))
@@ -144,6 +160,51 @@ class EdiCollection(object):
 
 
 
+    def _get_freq_indices(self, station_index, freqs):
+        """
+        get the indices of the frequencies of a station which are within ptol of each of freqs,
+        the station's frequencies are searched for all of freqs at once
+
+        :param station_index: index of the station in mt_obj_list
+        :param freqs: sequence of frequencies (Hz)
+
+        :return: list with a list of indices for each of freqs, in the order of the station's frequencies
+        """
+        sorted_freqs, freq_order = self._sorted_freqs[station_index]
+        freqs = np.asarray(freqs)
+        i_start = np.searchsorted(sorted_freqs, freqs * (1 - self.ptol), side='right')
+        i_end = np.searchsorted(sorted_freqs, freqs * (1 + self.ptol), side='left')
+
+        return [np.sort(freq_order[i0:i1]).tolist() for i0, i1 in zip(i_start, i_end)]
+
+    @staticmethod
+    def _stack_pt_values(pt, ti):
+        """
+        stack the phase tensor and tipper values written out for each frequency
+
+        :param pt: PhaseTensor object
+        :param ti: Tipper object
+
+        :return: (n_freq, 10) array of phi_min, phi_max, azimuth, skew, n_skew, elliptic,
+                 tip_mag_re, tip_mag_im, tip_ang_re, tip_ang_im
+        """
+        beta = pt.beta
+        return np.column_stack((pt.phimin, pt.phimax, pt.azimuth, beta, 2 * beta,
+                                pt.ellipticity, ti.mag_real, ti.mag_imag,
+                                ti.angle_real, ti.angle_imag))
+
+    def _get_station_pt_values(self):
+        """
+        get the stacked phase tensor and tipper values of each station, computed once on first use
+
+        :return: list of (n_freq, 10) arrays in the order of mt_obj_list
+        """
+        if self._station_pt_values is None:
+            self._station_pt_values = [self._stack_pt_values(mt_obj.pt, mt_obj.Tipper)
+                                       for mt_obj in self.mt_obj_list]
+
+        return self._station_pt_values
+
     def get_periods_by_stats(self, percentage=10.0):
         """
         check the presence of each period in all edi files, keep a list of periods which are at least percentage present
@@ -379,8 +440,10 @@ class EdiCollection(object):
                 pt_dict['phi_min'] = pt.phimin[p_index]
                 pt_dict['phi_max'] = pt.phimax[p_index]
                 pt_dict['azimuth']= pt.azimuth[p_index]
-                pt_dict['skew'] = pt.beta[p_index]
-                pt_dict['n_skew'] = 2 * pt.beta[p_index]
+                # beta is recomputed on every access, read it once
+                skew = pt.beta[p_index]
+                pt_dict['skew'] = skew
+                pt_dict['n_skew'] = 2 * skew
                 pt_dict['elliptic'] = pt.ellipticity[p_index]
 
                 pt_dict['tip_mag_re']= ti.mag_real[p_index]
@@ -397,7 +460,8 @@ class EdiCollection(object):
 
     def create_phase_tensor_csv(self, dest_dir, period_list=None,
                                 interpolate=True,
-                                file_name="phase_tensor.csv"):
+                                file_name="phase_tensor.csv",
+                                file_format='csv'):
         """
         create phase tensor ellipse and tipper properties.
         Implementation based on mtpy.utils.shapefiles_creator.ShapeFilesCreator.create_csv_files
@@ -407,10 +471,18 @@ class EdiCollection(object):
                             frequencies are output
         :param interpolate: Boolean to indicate whether to interpolate data onto given period_list
         :param file_name: output file name
+        :param file_format: 'csv', or 'feather' to write the tables as feather files (needs pyarrow),
+                            which are much faster to write and to read back, see process_csv_folder
 
         :return: pt_dict
         """
-        csvfname = os.path.join(dest_dir, file_name)
+        if file_format not in ('csv', 'feather'):
+            raise ValueError("file_format must be 'csv' or 'feather', not %s" % file_format)
+
+        file_base, file_ext = os.path.splitext(file_name)
+        if file_format == 'feather':
+            file_ext = '.feather'
+        csvfname = os.path.join(dest_dir, file_base + file_ext)
 
         pt_dict = {}
 
@@ -424,71 +496,96 @@ class EdiCollection(object):
             freq_list = 1./np.array(period_list)
         # end if
 
-        with open(csvfname, "wb") as csvf:
-            writer = csv.writer(csvf)
-            writer.writerow(csv_header)
+        # rows of all freqs, and where the rows of each freq are among them
+        pt_rows = []
+        freq_rows = []
 
-            for freq in freq_list:
-                ptlist = []
-                for mt_obj in self.mt_obj_list:
-                    f_index_list = None
-                    pt = None
-                    ti = None
-
-                    if(interpolate):
-                        f_index_list = [0]
-
-                        newZ = None
-                        newTipper = None
-                        newZ, newTipper = mt_obj.interpolate([freq], bounds_error=False)
-
-                        pt = MTpt.PhaseTensor(z_object=newZ)
-                        ti = newTipper
-                    else:
-                        freq_min = freq * (1 - self.ptol)
-                        freq_max = freq * (1 + self.ptol)
-
-                        f_index_list = [ff for ff, f2 in enumerate(mt_obj.Z.freq)
-                                        if (f2 > freq_min) and (f2 < freq_max)]
-                        pt = mt_obj.pt
-                        ti = mt_obj.Tipper
-                    #end if
-
-                    if len(f_index_list) > 1:
-                        self._logger.warn("more than one freq found %s", f_index_list)
-                    if len(f_index_list) >= 1:
-                        p_index = f_index_list[0]
-                        # geographic coord lat long and elevation
-                        # long, lat, elev = (mt_obj.lon, mt_obj.lat, 0)
-                        station, lon, lat = (mt_obj.station, mt_obj.lon, mt_obj.lat)
-
-                        pt_stat = [station, freq, lon, lat,
-                                   pt.phimin[p_index],
-                                   pt.phimax[p_index],
-                                   pt.azimuth[p_index],
-                                   pt.beta[p_index],
-                                   2 * pt.beta[p_index],
-                                   pt.ellipticity[p_index],  # FZ: get ellipticity begin here
-                                   ti.mag_real[p_index],
-                                   ti.mag_imag[p_index],
-                                   ti.angle_real[p_index],
-                                   ti.angle_imag[p_index]]
-
-                        ptlist.append(pt_stat)
-                    else:
-                        self._logger.warn("Freq %s NOT found for this station %s", freq, mt_obj.station)
-
-                csv_freq_file = os.path.join(dest_dir,
-                                             '{name[0]}_{freq}Hz{name[1]}'.format(
-                                                 freq=str(freq), name=os.path.splitext(file_name)))
-                with open(csv_freq_file, "wb") as freq_csvf:
-                    writer_freq = csv.writer(freq_csvf)
-                    writer_freq.writerow(csv_header)
-                    writer_freq.writerows(ptlist)
+        if not interpolate:
+            # matching frequencies of each station, for all freqs at once
+            station_f_indices = [self._get_freq_indices(station_index, freq_list)
+                                 for station_index in range(len(self.mt_obj_list))]
+
+        for freq_number, freq in enumerate(freq_list):
+            ptlist = []
+            missed_stations = []
+            for station_index, mt_obj in enumerate(self.mt_obj_list):
+                f_index_list = None
+                pt_values = None
+
+                if(interpolate):
+                    f_index_list = [0]
+
+                    newZ = None
+                    newTipper = None
+                    newZ, newTipper = mt_obj.interpolate([freq], bounds_error=False)
+
+                    pt_values = self._stack_pt_values(MTpt.PhaseTensor(z_object=newZ),
+                                                      newTipper)
+                else:
+                    f_index_list = station_f_indices[station_index][freq_number]
+                    pt_values = self._get_station_pt_values()[station_index]
+                #end if
+
+                if len(f_index_list) > 1:
+                    self._logger.warn("more than one freq found %s", f_index_list)
+                if len(f_index_list) >= 1:
+                    p_index = f_index_list[0]
+                    # geographic coord lat long and elevation
+                    # long, lat, elev = (mt_obj.lon, mt_obj.lat, 0)
+                    station, lon, lat = (mt_obj.station, mt_obj.lon, mt_obj.lat)
+
+                    pt_stat = [station, freq, lon, lat] + list(pt_values[p_index])
+
+                    ptlist.append(pt_stat)
+                else:
+                    missed_stations.append(mt_obj.station)
+
+            # one message per freq rather than per station
+            if missed_stations:
+                self._logger.warn("Freq %s NOT found for %s stations: %s",
+                                  freq, len(missed_stations), missed_stations)
+
+            freq_rows.append((freq, len(pt_rows), len(pt_rows) + len(ptlist)))
+            pt_rows.extend(ptlist)
 
-                writer.writerows(ptlist)
+            pt_dict[freq] = ptlist
 
-                pt_dict[freq] = ptlist
+        # write the rows of all freqs in one go, then each freq's block of
+        # rows into its own file. Numbers, nan and line ends are written as
+        # csv.writer would write them.
+        csv_format = dict(index=False, float_format='%r', na_rep='nan',
+                          line_terminator='\r\n')
+
+        def write_table(df, fname):
+            if file_format == 'feather':
+                # feather only stores frames with a default index
+                df.reset_index(drop=True).to_feather(fname)
+            else:
+                df.to_csv(fname, **csv_format)
+
+        pt_df = pd.DataFrame(pt_rows, columns=csv_header)
+        write_table(pt_df, csvfname)
+
+        freq_blocks = []
+        for freq, i_start, i_end in freq_rows:
+            csv_freq_file = os.path.join(dest_dir,
+                                         '{name[0]}_{freq}Hz{name[1]}'.format(
+                                             freq=str(freq), name=(file_base, file_ext)))
+            freq_blocks.append((csv_freq_file, pt_df.iloc[i_start:i_end]))
+
+        # the files are independent, write them from several threads as
+        # the file io releases the GIL
+        def write_freq_csv(freq_block):
+            csv_freq_file, freq_df = freq_block
+            write_table(freq_df, csv_freq_file)
+
+        if freq_blocks:
+            pool = ThreadPool(min(MAX_CSV_WRITERS, len(freq_blocks)))
+            try:
+                pool.map(write_freq_csv, freq_blocks)
+            finally:
+                pool.close()
+                pool.join()
 
         return pt_dict
 
@@ -545,90 +642,93 @@ class EdiCollection(object):
             freq_list = 1./np.array(period_list)
         # end if
 
-        with open(csvfname, "wb") as csvf:
+        # the summary csv stays open while the rows of each freq are added
+        with open_csv_file(csvfname, "w", CSV_BUFFER_SIZE) as csvf:
             writer = csv.writer(csvf)
             writer.writerow(csv_header)
 
-        for freq in freq_list:
-            mtlist = []
-            for mt_obj in self.mt_obj_list:
-                f_index_list = None
-                pt = None
-                ti = None
-                zobj = None
-                if (interpolate):
-                    f_index_list = [0]
-
-                    newZ = None
-                    newTipper = None
-                    newZ, newTipper = mt_obj.interpolate([freq], bounds_error=False)
-
-                    pt = MTpt.PhaseTensor(z_object=newZ)
-                    ti = newTipper
-                    zobj = newZ
-                else:
-                    freq_max = freq * (1 + self.ptol)
-                    freq_min = freq * (1 - self.ptol)
-                    f_index_list = np.where((mt_obj.Z.freq < freq_max) & (mt_obj.Z.freq > freq_min))
-
-                    pt = mt_obj.pt
-                    ti = mt_obj.Tipper
-                    zobj = mt_obj.Z
-                # end if
-
-                if len(f_index_list) > 1:
-                    self._logger.warn("more than one freq found %s", f_index_list)
-
-                if len(f_index_list) >= 1:
-                    p_index = f_index_list[0]
-
-                    self._logger.debug("The freqs index %s", f_index_list)
-                    # geographic coord lat long and elevation
-                    # long, lat, elev = (mt_obj.lon, mt_obj.lat, 0)
-                    station, lat, lon = (
-                        mt_obj.station, mt_obj.lat, mt_obj.lon)
-
-                    resist_phase = mtplottools.ResPhase(z_object=zobj)
-                    # resist_phase.compute_res_phase()
-
-                    mt_stat = [freq, station, lat, lon,
-                               zobj.z[p_index, 0, 0].real,
-                               zobj.z[p_index, 0, 0].imag,
-                               zobj.z[p_index, 0, 1].real,
-                               zobj.z[p_index, 0, 1].imag,
-                               zobj.z[p_index, 1, 0].real,
-                               zobj.z[p_index, 1, 0].imag,
-                               zobj.z[p_index, 1, 1].real,
-                               zobj.z[p_index, 1, 1].imag,
-                               ti.tipper[p_index, 0, 0].real,
-                               ti.tipper[p_index, 0, 0].imag,
-                               ti.tipper[p_index, 0, 1].real,
-                               ti.tipper[p_index, 0, 1].imag,
-                               resist_phase.resxx[p_index], resist_phase.resxy[p_index],
-                               resist_phase.resyx[p_index], resist_phase.resyy[p_index],
-                               resist_phase.phasexx[p_index], resist_phase.phasexy[p_index],
-                               resist_phase.phaseyx[p_index], resist_phase.phaseyy[p_index]
-                               ]
-                    mtlist.append(mt_stat)
-
-                else:
-                    self._logger.warn(
-                        'Freq %s NOT found for this station %s', freq, mt_obj.station)
-
-            with open(csvfname, "ab") as csvf:  # summary csv for all freqs
-                writer = csv.writer(csvf)
-                writer.writerows(mtlist)
-
-            csv_basename2 = "%s_%sHz.csv" % (csv_basename, str(freq))
-            csvfile2 = os.path.join(dest_dir, csv_basename2)
-
-            with open(csvfile2, "wb") as csvf:  # individual csvfile for each freq
-                writer = csv.writer(csvf)
+            for freq in freq_list:
+                mtlist = []
+                missed_stations = []
+                csv_basename2 = "%s_%sHz.csv" % (csv_basename, str(freq))
+                csvfile2 = os.path.join(dest_dir, csv_basename2)
 
-                writer.writerow(csv_header)
-                writer.writerows(mtlist)
+                with open_csv_file(csvfile2, "w", CSV_BUFFER_SIZE) as freq_csvf:  # individual csvfile for each freq
+                    writer_freq = csv.writer(freq_csvf)
+                    writer_freq.writerow(csv_header)
 
-            pt_dict[freq] = mtlist
+                    for mt_obj in self.mt_obj_list:
+                        f_index_list = None
+                        pt = None
+                        ti = None
+                        zobj = None
+                        if (interpolate):
+                            f_index_list = [0]
+
+                            newZ = None
+                            newTipper = None
+                            newZ, newTipper = mt_obj.interpolate([freq], bounds_error=False)
+
+                            pt = MTpt.PhaseTensor(z_object=newZ)
+                            ti = newTipper
+                            zobj = newZ
+                        else:
+                            freq_max = freq * (1 + self.ptol)
+                            freq_min = freq * (1 - self.ptol)
+                            f_index_list = np.where((mt_obj.Z.freq < freq_max) & (mt_obj.Z.freq > freq_min))
+
+                            pt = mt_obj.pt
+                            ti = mt_obj.Tipper
+                            zobj = mt_obj.Z
+                        # end if
+
+                        if len(f_index_list) > 1:
+                            self._logger.warn("more than one freq found %s", f_index_list)
+
+                        if len(f_index_list) >= 1:
+                            p_index = f_index_list[0]
+
+                            self._logger.debug("The freqs index %s", f_index_list)
+                            # geographic coord lat long and elevation
+                            # long, lat, elev = (mt_obj.lon, mt_obj.lat, 0)
+                            station, lat, lon = (
+                                mt_obj.station, mt_obj.lat, mt_obj.lon)
+
+                            resist_phase = mtplottools.ResPhase(z_object=zobj)
+                            # resist_phase.compute_res_phase()
+
+                            mt_stat = [freq, station, lat, lon,
+                                       zobj.z[p_index, 0, 0].real,
+                                       zobj.z[p_index, 0, 0].imag,
+                                       zobj.z[p_index, 0, 1].real,
+                                       zobj.z[p_index, 0, 1].imag,
+                                       zobj.z[p_index, 1, 0].real,
+                                       zobj.z[p_index, 1, 0].imag,
+                                       zobj.z[p_index, 1, 1].real,
+                                       zobj.z[p_index, 1, 1].imag,
+                                       ti.tipper[p_index, 0, 0].real,
+                                       ti.tipper[p_index, 0, 0].imag,
+                                       ti.tipper[p_index, 0, 1].real,
+                                       ti.tipper[p_index, 0, 1].imag,
+                                       resist_phase.resxx[p_index], resist_phase.resxy[p_index],
+                                       resist_phase.resyx[p_index], resist_phase.resyy[p_index],
+                                       resist_phase.phasexx[p_index], resist_phase.phasexy[p_index],
+                                       resist_phase.phaseyx[p_index], resist_phase.phaseyy[p_index]
+                                       ]
+                            # rows go straight to the summary and the freq file
+                            writer.writerow(mt_stat)
+                            writer_freq.writerow(mt_stat)
+                            mtlist.append(mt_stat)
+
+                        else:
+                            missed_stations.append(mt_obj.station)
+
+                # one message per freq rather than per station
+                if missed_stations:
+                    self._logger.warn('Freq %s NOT found for %s stations: %s',
+                                      freq, len(missed_stations), missed_stations)
+
+                pt_dict[freq] = mtlist
 
         return csvfname
 
@@ -766,10 +866,10 @@ class EdiCollection(object):
         pdf = pd.DataFrame(mt_stations, columns=['Station', 'Lat', 'Lon',  'UtmZone'])
 
         mt_distances = []
-        for i in xrange(len(pdf)):
+        for i in range(len(pdf)):
             xi=pdf.iloc[i]['Lat']
             yi=pdf.iloc[i]['Lon']
-            for j in xrange(i+1, len(pdf)):
+            for j in range(i+1, len(pdf)):
                 xj = pdf.iloc[j]['Lat']
                 yj = pdf.iloc[j]['Lon']
                 dist = math.sqrt((xi-xj)**2 + (yi - yj)**2)
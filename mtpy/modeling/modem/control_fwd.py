@@ -9,9 +9,16 @@ ModEM
 # revised by AK 2017 to bring across functionality from ak branch
 
 """
+from __future__ import print_function
 
 import os
 
+try:
+    from sys import intern
+except ImportError:
+    # python 2, intern is a builtin
+    pass
+
 from mtpy.utils import exceptions as mtex
 
 __all__ = ['ControlFwd']
@@ -25,6 +32,30 @@ class ControlFwd(object):
 
     """
 
+    # the control keys and their formats are fixed, so build them once for
+    # the class rather than for every instance
+    _control_keys = [intern(key) for key in
+                     ['Number of QMR iters per divergence correction',
+                      'Maximum number of divergence correction calls',
+                      'Maximum number of divergence correction iters',
+                      'Misfit tolerance for EM forward solver',
+                      'Misfit tolerance for EM adjoint solver',
+                      'Misfit tolerance for divergence correction']]
+    _string_fmt_dict = dict(zip(_control_keys,
+                                ['<.0f', '<.0f', '<.0f', '<.1e', '<.1e', '<.1e']))
+    # the padded key at the start of each line never changes
+    _line_prefix_dict = dict((key, '{0:<47}: '.format(key))
+                             for key in _control_keys)
+    # attribute each control key is stored in
+    _key_to_attr = dict(zip(_control_keys,
+                            ['num_qmr_iter', 'max_num_div_calls',
+                             'max_num_div_iters', 'misfit_tol_fwd',
+                             'misfit_tol_adj', 'misfit_tol_div']))
+    # string fields are written with a bare '<' format, everything else is
+    # numeric, so the value type of each key is known before reading
+    _parser_dict = dict((key, str if str_fmt == '<' else float)
+                        for key, str_fmt in _string_fmt_dict.items())
+
     def __init__(self, **kwargs):
 
         self.num_qmr_iter = kwargs.pop('num_qmr_iter', 40)
@@ -39,25 +70,14 @@ class ControlFwd(object):
         self.control_fn = kwargs.pop('control_fn', os.path.join(self.save_path,
                                                                 self.fn_basename))
 
-        self._control_keys = ['Number of QMR iters per divergence correction',
-                              'Maximum number of divergence correction calls',
-                              'Maximum number of divergence correction iters',
-                              'Misfit tolerance for EM forward solver',
-                              'Misfit tolerance for EM adjoint solver',
-                              'Misfit tolerance for divergence correction']
-
-        self._control_dict = dict([(key, value)
-                                   for key, value in zip(self._control_keys,
-                                                         [self.num_qmr_iter,
-                                                          self.max_num_div_calls,
-                                                          self.max_num_div_iters,
-                                                          self.misfit_tol_fwd,
-                                                          self.misfit_tol_adj,
-                                                          self.misfit_tol_div])])
-        self._string_fmt_dict = dict([(key, value)
-                                      for key, value in zip(self._control_keys,
-                                                            ['<.0f', '<.0f', '<.0f', '<.1e', '<.1e',
-                                                             '<.1e'])])
+        self._control_dict = {key: value for key, value in
+                              zip(self._control_keys,
+                                  (self.num_qmr_iter,
+                                   self.max_num_div_calls,
+                                   self.max_num_div_iters,
+                                   self.misfit_tol_fwd,
+                                   self.misfit_tol_adj,
+                                   self.misfit_tol_div))}
 
     def write_control_file(self, control_fn=None, save_path=None,
                            fn_basename=None):
@@ -92,26 +112,28 @@ class ControlFwd(object):
 
         self.control_fn = os.path.join(self.save_path, self.fn_basename)
 
-        self._control_dict = dict([(key, value)
-                                   for key, value in zip(self._control_keys,
-                                                         [self.num_qmr_iter,
-                                                          self.max_num_div_calls,
-                                                          self.max_num_div_iters,
-                                                          self.misfit_tol_fwd,
-                                                          self.misfit_tol_adj,
-                                                          self.misfit_tol_div])])
-
+        # refresh the values in place from the current attributes
+        for key, value in zip(self._control_keys,
+                              (self.num_qmr_iter,
+                               self.max_num_div_calls,
+                               self.max_num_div_iters,
+                               self.misfit_tol_fwd,
+                               self.misfit_tol_adj,
+                               self.misfit_tol_div)):
+            self._control_dict[key] = value
+
+        # bind the value format once rather than looking it up every line
+        value_fmt = '{0:{1}}\n'.format
         clines = []
         for key in self._control_keys:
             value = self._control_dict[key]
             str_fmt = self._string_fmt_dict[key]
-            clines.append('{0:<47}: {1:{2}}\n'.format(key, value, str_fmt))
+            clines.append(self._line_prefix_dict[key] + value_fmt(value, str_fmt))
 
-        cfid = file(self.control_fn, 'w')
-        cfid.writelines(clines)
-        cfid.close()
+        with open(self.control_fn, 'w', buffering=2 ** 20) as cfid:
+            cfid.write(''.join(clines))
 
-        print 'Wrote ModEM control file to {0}'.format(self.control_fn)
+        print('Wrote ModEM control file to {0}'.format(self.control_fn))
 
     def read_control_file(self, control_fn=None):
         """
@@ -132,22 +154,17 @@ class ControlFwd(object):
         self.save_path = os.path.dirname(self.control_fn)
         self.fn_basename = os.path.basename(self.control_fn)
 
-        cfid = file(self.control_fn, 'r')
-        clines = cfid.readlines()
-        cfid.close()
+        with open(self.control_fn, 'r') as cfid:
+            clines = cfid.read().splitlines()
         for cline in clines:
-            clist = cline.strip().split(':')
-            if len(clist) == 2:
-
-                try:
-                    self._control_dict[clist[0].strip()] = float(clist[1])
-                except ValueError:
-                    self._control_dict[clist[0].strip()] = clist[1]
-
-        # set attributes
-        attr_list = ['num_qmr_iter', 'max_num_div_calls', 'max_num_div_iters',
-                     'misfit_tol_fwd', 'misfit_tol_adj', 'misfit_tol_div']
-        for key, kattr in zip(self._control_keys, attr_list):
-            setattr(self, kattr, self._control_dict[key])
-
-
+            # split on the first colon only so values may contain colons
+            key, sep, value = cline.partition(':')
+            if sep:
+                # interned to match the interned _control_keys
+                key = intern(key.strip())
+                parser = self._parser_dict.get(key, str)
+                value = parser(value.strip())
+                self._control_dict[key] = value
+                attr = self._key_to_attr.get(key)
+                if attr is not None:
+                    setattr(self, attr, value)
@@ -9,8 +9,16 @@ ModEM
 # revised by AK 2017 to bring across functionality from ak branch
 
 """
+from __future__ import print_function
+
 import os
 
+try:
+    from sys import intern
+except ImportError:
+    # python 2, intern is a builtin
+    pass
+
 from mtpy.utils import exceptions as mtex
 
 __all__ = ['ControlInv']
@@ -22,6 +30,32 @@ class ControlInv(object):
 
     """
 
+    # the control keys and their formats are fixed, so build them once for
+    # the class rather than for every instance
+    _control_keys = [intern(key) for key in
+                     ['Model and data output file name',
+                      'Initial damping factor lambda',
+                      'To update lambda divide by',
+                      'Initial search step in model units',
+                      'Restart when rms diff is less than',
+                      'Exit search when rms is less than',
+                      'Exit when lambda is less than',
+                      'Maximum number of iterations']]
+    _string_fmt_dict = dict(zip(_control_keys,
+                                ['<', '<.1f', '<.1f', '<.1f', '<.1e', '<.2f', '<.1e', '<.0f']))
+    # the padded key at the start of each line never changes
+    _line_prefix_dict = dict((key, '{0:<35}: '.format(key))
+                             for key in _control_keys)
+    # attribute each control key is stored in
+    _key_to_attr = dict(zip(_control_keys,
+                            ['output_fn', 'lambda_initial', 'lambda_step',
+                             'model_search_step', 'rms_reset_search',
+                             'rms_target', 'lambda_exit', 'max_iterations']))
+    # string fields are written with a bare '<' format, everything else is
+    # numeric, so the value type of each key is known before reading
+    _parser_dict = dict((key, str if str_fmt == '<' else float)
+                        for key, str_fmt in _string_fmt_dict.items())
+
     def __init__(self, **kwargs):
 
         self.output_fn = kwargs.pop('output_fn', 'MODULAR_NLCG')
@@ -37,25 +71,16 @@ class ControlInv(object):
         self.control_fn = kwargs.pop('control_fn', os.path.join(self.save_path,
                                                                 self.fn_basename))
 
-        self._control_keys = ['Model and data output file name',
-                              'Initial damping factor lambda',
-                              'To update lambda divide by',
-                              'Initial search step in model units',
-                              'Restart when rms diff is less than',
-                              'Exit search when rms is less than',
-                              'Exit when lambda is less than',
-                              'Maximum number of iterations']
-
-        self._control_dict = dict([(key, value)
-                                   for key, value in zip(self._control_keys,
-                                                         [self.output_fn, self.lambda_initial,
-                                                          self.lambda_step, self.model_search_step,
-                                                          self.rms_reset_search, self.rms_target,
-                                                          self.lambda_exit, self.max_iterations])])
-        self._string_fmt_dict = dict([(key, value)
-                                      for key, value in zip(self._control_keys,
-                                                            ['<', '<.1f', '<.1f', '<.1f', '<.1e',
-                                                             '<.2f', '<.1e', '<.0f'])])
+        self._control_dict = {key: value for key, value in
+                              zip(self._control_keys,
+                                  (self.output_fn,
+                                   self.lambda_initial,
+                                   self.lambda_step,
+                                   self.model_search_step,
+                                   self.rms_reset_search,
+                                   self.rms_target,
+                                   self.lambda_exit,
+                                   self.max_iterations))}
 
     def write_control_file(self, control_fn=None, save_path=None,
                            fn_basename=None):
@@ -90,24 +115,30 @@ class ControlInv(object):
 
         self.control_fn = os.path.join(self.save_path, self.fn_basename)
 
-        self._control_dict = dict([(key, value)
-                                   for key, value in zip(self._control_keys,
-                                                         [self.output_fn, self.lambda_initial,
-                                                          self.lambda_step, self.model_search_step,
-                                                          self.rms_reset_search, self.rms_target,
-                                                          self.lambda_exit, self.max_iterations])])
-
+        # refresh the values in place from the current attributes
+        for key, value in zip(self._control_keys,
+                              (self.output_fn,
+                               self.lambda_initial,
+                               self.lambda_step,
+                               self.model_search_step,
+                               self.rms_reset_search,
+                               self.rms_target,
+                               self.lambda_exit,
+                               self.max_iterations)):
+            self._control_dict[key] = value
+
+        # bind the value format once rather than looking it up every line
+        value_fmt = '{0:{1}}\n'.format
         clines = []
         for key in self._control_keys:
             value = self._control_dict[key]
             str_fmt = self._string_fmt_dict[key]
-            clines.append('{0:<35}: {1:{2}}\n'.format(key, value, str_fmt))
+            clines.append(self._line_prefix_dict[key] + value_fmt(value, str_fmt))
 
-        cfid = file(self.control_fn, 'w')
-        cfid.writelines(clines)
-        cfid.close()
+        with open(self.control_fn, 'w', buffering=2 ** 20) as cfid:
+            cfid.write(''.join(clines))
 
-        print 'Wrote ModEM control file to {0}'.format(self.control_fn)
+        print('Wrote ModEM control file to {0}'.format(self.control_fn))
 
     def read_control_file(self, control_fn=None):
         """
@@ -128,23 +159,17 @@ class ControlInv(object):
         self.save_path = os.path.dirname(self.control_fn)
         self.fn_basename = os.path.basename(self.control_fn)
 
-        cfid = file(self.control_fn, 'r')
-        clines = cfid.readlines()
-        cfid.close()
+        with open(self.control_fn, 'r') as cfid:
+            clines = cfid.read().splitlines()
         for cline in clines:
-            clist = cline.strip().split(':')
-            if len(clist) == 2:
-
-                try:
-                    self._control_dict[clist[0].strip()] = float(clist[1])
-                except ValueError:
-                    self._control_dict[clist[0].strip()] = clist[1]
-
-        # set attributes
-        attr_list = ['output_fn', 'lambda_initial', 'lambda_step',
-                     'model_search_step', 'rms_reset_search', 'rms_target',
-                     'lambda_exit', 'max_iterations']
-        for key, kattr in zip(self._control_keys, attr_list):
-            setattr(self, kattr, self._control_dict[key])
-
-
+            # split on the first colon only so values may contain colons
+            key, sep, value = cline.partition(':')
+            if sep:
+                # interned to match the interned _control_keys
+                key = intern(key.strip())
+                parser = self._parser_dict.get(key, str)
+                value = parser(value.strip())
+                self._control_dict[key] = value
+                attr = self._key_to_attr.get(key)
+                if attr is not None:
+                    setattr(self, attr, value)
@@ -9,6 +9,8 @@ ModEM
 # revised by AK 2017 to bring across functionality from ak branch
 
 """
+from __future__ import print_function
+
 import os
 
 import numpy as np
@@ -32,6 +34,24 @@ class Covariance(object):
 
     """
 
+    # the header never changes, so build it once for the class
+    _header_str = '\n'.join(['+{0}+'.format('-' * 77),
+                             '| This file defines model covariance for a recursive autoregression scheme.   |',
+                             '| The model space may be divided into distinct areas using integer masks.     |',
+                             '| Mask 0 is reserved for air; mask 9 is reserved for ocean. Smoothing between |',
+                             '| air, ocean and the rest of the model is turned off automatically. You can   |',
+                             '| also define exceptions to override smoothing between any two model areas.   |',
+                             '| To turn off smoothing set it to zero.  This header is 16 lines long.        |',
+                             '| 1. Grid dimensions excluding air layers (Nx, Ny, NzEarth)                   |',
+                             '| 2. Smoothing in the X direction (NzEarth real values)                       |',
+                             '| 3. Smoothing in the Y direction (NzEarth real values)                       |',
+                             '| 4. Vertical smoothing (1 real value)                                        |',
+                             '| 5. Number of times the smoothing should be applied (1 integer >= 0)         |',
+                             '| 6. Number of exceptions (1 integer >= 0)                                    |',
+                             '| 7. Exceptions in the for e.g. 2 3 0. (to turn off smoothing between 3 & 4)  |',
+                             '| 8. Two integer layer indices and Nx x Ny block of masks, repeated as needed.|',
+                             '+{0}+'.format('-' * 77)])
+
     def __init__(self, grid_dimensions=None, **kwargs):
         self._logger = MtPyLog.get_mtpy_logger(self.__class__.__name__)
 
@@ -49,22 +69,8 @@ class Covariance(object):
 
         self.cov_fn = None
 
-        self._header_str = '\n'.join(['+{0}+'.format('-' * 77),
-                                      '| This file defines model covariance for a recursive autoregression scheme.   |',
-                                      '| The model space may be divided into distinct areas using integer masks.     |',
-                                      '| Mask 0 is reserved for air; mask 9 is reserved for ocean. Smoothing between |',
-                                      '| air, ocean and the rest of the model is turned off automatically. You can   |',
-                                      '| also define exceptions to override smoothing between any two model areas.   |',
-                                      '| To turn off smoothing set it to zero.  This header is 16 lines long.        |',
-                                      '| 1. Grid dimensions excluding air layers (Nx, Ny, NzEarth)                   |',
-                                      '| 2. Smoothing in the X direction (NzEarth real values)                       |',
-                                      '| 3. Smoothing in the Y direction (NzEarth real values)                       |',
-                                      '| 4. Vertical smoothing (1 real value)                                        |',
-                                      '| 5. Number of times the smoothing should be applied (1 integer >= 0)         |',
-                                      '| 6. Number of exceptions (1 integer >= 0)                                    |',
-                                      '| 7. Exceptions in the for e.g. 2 3 0. (to turn off smoothing between 3 & 4)  |',
-                                      '| 8. Two integer layer indices and Nx x Ny block of masks, repeated as needed.|',
-                                      '+{0}+'.format('-' * 77)])
+        # resistivity models already read, keyed by (model_fn, mtime)
+        self._model_cache = {}
 
         for key in kwargs.keys():
             if hasattr(self, key):
@@ -82,20 +88,28 @@ class Covariance(object):
         """
 
         if model_fn is not None:
-            mod_obj = Model()
-            mod_obj.read_model_file(model_fn)
+            # only parse the model file again if it changed since last read
+            cache_key = (model_fn, os.path.getmtime(model_fn))
+            res_model = self._model_cache.get(cache_key)
+            if res_model is None:
+                mod_obj = Model()
+                mod_obj.read_model_file(model_fn)
+                res_model = mod_obj.res_model
+                self._model_cache = {cache_key: res_model}
+                print('Reading {0}'.format(model_fn))
 
             # update save_path from model path if not provided separately
             if save_path is None:
                 save_path = os.path.dirname(model_fn)
 
-            print 'Reading {0}'.format(model_fn)
-            self.grid_dimensions = mod_obj.res_model.shape
+            self.grid_dimensions = res_model.shape
             if self.mask_arr is None:
-                self.mask_arr = np.ones_like(mod_obj.res_model)
-            self.mask_arr[np.where(mod_obj.res_model >= air * .9)] = 0
-            self.mask_arr[np.where((mod_obj.res_model <= sea_water * 1.1) &
-                                   (mod_obj.res_model >= sea_water * .9))] = 9
+                # masks only hold small integer codes, store them as int8
+                self.mask_arr = np.ones(res_model.shape, dtype=np.int8)
+            self.mask_arr[res_model >= air * .9] = 0
+            sea_mask = res_model <= sea_water * 1.1
+            np.logical_and(sea_mask, res_model >= sea_water * .9, out=sea_mask)
+            self.mask_arr[sea_mask] = 9
 
         if self.grid_dimensions is None:
             raise CovarianceError('Grid dimensions are None, input as (Nx, Ny, Nz)')
@@ -109,59 +123,72 @@ class Covariance(object):
                 self.cov_fn_basename = cov_fn_basename
             self.cov_fn = os.path.join(self.save_path, self.cov_fn_basename)
 
-        clines = [self._header_str, '\n\n', ' {0:<10}{1:<10}{2:<10}\n'.format(self.grid_dimensions[0],
-                                                                              self.grid_dimensions[1],
-                                                                              self.grid_dimensions[2]), '\n']
+        # lines are collected without newlines and joined once on write
+        clines = [self._header_str, '',
+                  ' {0:<10}{1:<10}{2:<10}'.format(self.grid_dimensions[0],
+                                                  self.grid_dimensions[1],
+                                                  self.grid_dimensions[2]),
+                  '']
 
         # --> grid dimensions
 
-        # --> smoothing in north direction
-        n_smooth_line = ''
-        for zz in range(self.grid_dimensions[2]):
-            n_smooth_line += ' {0:<5.1f}'.format(self.smoothing_north)
-        clines.append(n_smooth_line + '\n')
+        # --> smoothing in north direction, same value for every layer
+        n_smooth_line = ' {0:<5.1f}'.format(self.smoothing_north) * self.grid_dimensions[2]
+        clines.append(n_smooth_line)
 
-        # --> smoothing in east direction
-        e_smooth_line = ''
-        for zz in range(self.grid_dimensions[2]):
-            e_smooth_line += ' {0:<5.1f}'.format(self.smoothing_east)
-        clines.append(e_smooth_line + '\n')
+        # --> smoothing in east direction, same value for every layer
+        e_smooth_line = ' {0:<5.1f}'.format(self.smoothing_east) * self.grid_dimensions[2]
+        clines.append(e_smooth_line)
 
         # --> smoothing in vertical direction
-        clines.append(' {0:<5.1f}\n'.format(self.smoothing_z))
-        clines.append('\n')
+        clines.append(' {0:<5.1f}'.format(self.smoothing_z))
+        clines.append('')
 
         # --> number of times to apply smoothing
-        clines.append(' {0:<2.0f}\n'.format(self.smoothing_num))
-        clines.append('\n')
+        clines.append(' {0:<2.0f}'.format(self.smoothing_num))
+        clines.append('')
 
         # --> exceptions
-        clines.append(' {0:<.0f}\n'.format(len(self.exception_list)))
+        clines.append(' {0:<.0f}'.format(len(self.exception_list)))
         for exc in self.exception_list:
-            clines.append('{0:<5.0f}{1:<5.0f}{2:<5.0f}\n'.format(exc[0],
-                                                                 exc[1],
-                                                                 exc[2]))
-        clines.append('\n')
-        clines.append('\n')
+            clines.append('{0:<5.0f}{1:<5.0f}{2:<5.0f}'.format(exc[0],
+                                                               exc[1],
+                                                               exc[2]))
+        clines.append('')
+        clines.append('')
         # --> mask array
         if self.mask_arr is None:
             self.mask_arr = np.ones((self.grid_dimensions[0],
                                      self.grid_dimensions[1],
-                                     self.grid_dimensions[2]))
+                                     self.grid_dimensions[2]), dtype=np.int8)
 
         # need to flip north and south.
-        write_mask_arr = self.mask_arr[::-1, :, :].copy()
-        for zz in range(self.mask_arr.shape[2]):
-            clines.append(' {0:<8.0f}{0:<8.0f}\n'.format(zz + 1))
-            for nn in range(self.mask_arr.shape[0]):
-                cline = ''
-                for ee in range(self.mask_arr.shape[1]):
-                    cline += '{0:^3.0f}'.format(write_mask_arr[nn, ee, zz])
-                clines.append(cline + '\n')
-
-        cfid = file(self.cov_fn, 'w')
-        cfid.writelines(clines)
-        cfid.close()
+        write_mask_arr = self.mask_arr[::-1, :, :]
+
+        # masks only hold a handful of distinct values, so format each value
+        # once and look the characters up instead of formatting every cell
+        mask_values, mask_index = np.unique(write_mask_arr, return_inverse=True)
+        mask_strings = ['{0:^3.0f}'.format(value) for value in mask_values]
+        cell_width = max(len(cell) for cell in mask_strings)
+        mask_chars = np.array([cell.ljust(cell_width) for cell in mask_strings],
+                              dtype='S{0}'.format(cell_width))
+        mask_chars = mask_chars.view(np.uint8).reshape(-1, cell_width)
+
+        # fill one character block per layer, every row ending in a newline
+        nx, ny, nz = write_mask_arr.shape
+        mask_text = np.empty((nz, nx, ny * cell_width + 1), dtype=np.uint8)
+        mask_text[:, :, :-1] = mask_chars[mask_index.reshape(nx, ny, nz)].transpose(
+            2, 0, 1, 3).reshape(nz, nx, ny * cell_width)
+        mask_text[:, :, -1] = ord('\n')
+
+        layer_fmt = ' {0:<8.0f}{0:<8.0f}'.format
+        for zz in range(nz):
+            clines.append(layer_fmt(zz + 1))
+            clines.append(mask_text[zz].tobytes()[:-1].decode('ascii'))
+        clines.append('')
+
+        with open(self.cov_fn, 'w', buffering=2 ** 20) as cfid:
+            cfid.write('\n'.join(clines))
 
         self._logger.info('Wrote covariance file to {0}'.format(self.cov_fn))
 
@@ -201,7 +228,7 @@ class Covariance(object):
                 elif len(line_list) == 3:
                     nx, ny, nz = [int(ii) for ii in line_list]
                     self.grid_dimensions = (nx, ny, nz)
-                    self.mask_arr = np.ones((nx, ny, nz), dtype=np.int)
+                    self.mask_arr = np.ones((nx, ny, nz), dtype=np.int8)
                     self.smoothing_east = np.zeros(ny)
                     self.smoothing_north = np.zeros(nx)
                 elif len(line_list) == 2:
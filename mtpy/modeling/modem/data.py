@@ -23,6 +23,7 @@ from mtpy.core import z as mtz
 from mtpy.modeling import ws3dinv as ws
 from mtpy.utils import gis_tools as gis_tools
 from mtpy.utils.decorator import deprecated
+from mtpy.utils.filehandling import open_csv_file
 from mtpy.utils.mtpylog import MtPyLog
 
 from mtpy.modeling.modem.exception import ModEMError, DataError
@@ -1693,24 +1694,37 @@ class Data(object):
         # sx = self.station_locations.station_locations['rel_east']
         # sy = self.station_locations.station_locations['rel_north']
 
-        # find index of each station on grid
-        station_index_x = []
-        station_index_y = []
+        # find index of each station on grid, the grid is monotonic so use
+        # a binary search for all stations at once, station sx lies in cell
+        # sxi where grid_east[sxi] < sx <= grid_east[sxi + 1]
+        station_index_x = np.searchsorted(model_object.grid_east,
+                                          self.station_locations.station_locations['rel_east'],
+                                          side='left') - 1
+        station_index_y = np.searchsorted(model_object.grid_north,
+                                          self.station_locations.station_locations['rel_north'],
+                                          side='left') - 1
+
+        # stations outside the grid would get -1 or n_cells, and a -1 index
+        # silently wraps to the opposite edge of the model
+        outside = ((station_index_x < 0) | (station_index_x >= len(model_object.grid_east) - 1) |
+                   (station_index_y < 0) | (station_index_y >= len(model_object.grid_north) - 1))
+        if outside.any():
+            raise DataError("stations %s are outside the model grid" %
+                            list(self.station_locations.station_locations['station'][outside]))
+
+        # classify air cells once for the whole model rather than per station
+        air_cells = model_object.res_model > 0.95 * air_resistivity
+        below_air_cells = model_object.res_model < 0.95 * air_resistivity
+
         for sname in self.station_locations.station_locations['station']:
             ss = np.where(self.station_locations.station_locations['station'] == sname)[0][0]
-            # relative locations of stations
-            sx, sy = self.station_locations.station_locations['rel_east'][ss], \
-                     self.station_locations.station_locations['rel_north'][ss]
             # indices of stations on model grid
-            sxi = np.where((sx <= model_object.grid_east[1:]) & (
-                sx > model_object.grid_east[:-1]))[0][0]
-            syi = np.where((sy <= model_object.grid_north[1:]) & (
-                sy > model_object.grid_north[:-1]))[0][0]
+            sxi = station_index_x[ss]
+            syi = station_index_y[ss]
 
             # first, check if there are any air cells
-            if np.any(model_object.res_model[syi, sxi] > 0.95 * air_resistivity):
-                szi = np.amin(
-                    np.where((model_object.res_model[syi, sxi] < 0.95 * air_resistivity))[0])
+            if air_cells[syi, sxi].any():
+                szi = np.argmax(below_air_cells[syi, sxi])
             # otherwise place station at the top of the model
             else:
                 szi = 0
@@ -1718,9 +1732,6 @@ class Data(object):
             # get relevant grid point elevation
             topoval = model_object.grid_z[szi]
 
-            station_index_x.append(sxi)
-            station_index_y.append(syi)
-
             # update elevation in station locations and data array, +1 m as
             # data elevation needs to be below the topography (as advised by Naser)
             # ====================== ====================================================
@@ -1735,7 +1746,7 @@ class Data(object):
 
         # debug self.Data.write_data_file(save_path='/e/tmp', fill=False)
 
-        return station_index_x, station_index_y
+        return station_index_x.tolist(), station_index_y.tolist()
 
     # FZ: moved from the modem_data_to_phase_tensor.py ref: AUSLAMP-112
     def compute_phase_tensor(self, datfile, outdir):
@@ -1755,15 +1766,15 @@ class Data(object):
         md.read_data_file(data_fn=data_file)
 
         num_sites = md.data_array.shape[0]
-        print ("ModEM data file number of sites:", num_sites)
+        print("ModEM data file number of sites:", num_sites)
 
         first_site_periods = md.data_array[0][9]  # (23L, 2L, 2L)
-        print ("first_site_periods = %s" % str(first_site_periods.shape[0]))
+        print("first_site_periods = %s" % str(first_site_periods.shape[0]))
 
         period_list = md.period_list
         freq_list = 1.0 / period_list
         num_periods = len(period_list)
-        print ("ModEM data file number of periods:", num_periods)
+        print("ModEM data file number of periods:", num_periods)
 
         csv_basename ="modem_data_to_phase_tensor"
         csvfname = os.path.join(dest_dir, "%s.csv" % csv_basename)
@@ -1771,11 +1782,10 @@ class Data(object):
         csv_header = [
             'Freq', 'Station', 'Lat', 'Long', 'Phimin', 'Phimax', 'Ellipticity', 'Azimuth']
 
-        with open(csvfname, "wb") as csvf:
-            writer = csv.writer(csvf)
-            writer.writerow(csv_header)
+        # rows of all freqs, the summary csv is written once from them
+        all_csvrows = []
 
-        for period_num in xrange(num_periods):
+        for period_num in range(num_periods):
             per= period_list[period_num]
             freq = freq_list[period_num]
             self._logger.info("Working on period %s; frequency: %s", per, freq )
@@ -1814,19 +1824,22 @@ class Data(object):
 
                 csvrows.append(arow)
 
-            with open(csvfname, "ab") as csvf:  # append to this summary csv file for all freqs
-                writer = csv.writer(csvf)
-                writer.writerows(csvrows)
+            all_csvrows.extend(csvrows)
 
             csv_basename2 = "%s_%sHz.csv" % (csv_basename, str(freq))
             csvfile2 = os.path.join(dest_dir, csv_basename2)
 
-            with open(csvfile2, "wb") as csvf:  # csvfile  for eachindividual freq
+            with open_csv_file(csvfile2, "w") as csvf:  # csvfile  for eachindividual freq
                 writer = csv.writer(csvf)
                 writer.writerow(csv_header)
                 writer.writerows(csvrows)
 
         # Done with all sites and periods
+        with open_csv_file(csvfname, "w") as csvf:  # summary csv file for all freqs
+            writer = csv.writer(csvf)
+            writer.writerow(csv_header)
+            writer.writerows(all_csvrows)
+
         self._logger.info("CSV files created in %s", outdir)
 
         return csvfname
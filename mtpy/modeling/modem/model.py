@@ -16,6 +16,7 @@ import sys
 
 import numpy as np
 from matplotlib import pyplot as plt
+from matplotlib.collections import LineCollection
 from mpl_toolkits.axes_grid1 import make_axes_locatable
 from scipy import stats as stats, interpolate as spi
 
@@ -24,6 +25,7 @@ import mtpy.utils.calculator as mtcc
 from mtpy.modeling import ws3dinv as ws
 from mtpy.utils import mesh_tools as mtmesh, gis_tools as gis_tools, filehandling as mtfh
 from mtpy.utils.mtpylog import MtPyLog
+from mtpy.utils.numba_utils import compile_kernel, prange
 from .exception import ModelError
 import mtpy.utils.gocad as mtgocad
 
@@ -36,6 +38,28 @@ except ImportError:
 __all__ = ['Model']
 
 
+def _assign_between_surfaces(res_model, gcz, top_surface, bottom_surface,
+                             resistivity_value):
+    """
+    set res_model cells whose centres lie between top_surface (exclusive)
+    and bottom_surface (inclusive) to resistivity_value, in place.
+    """
+    n_north, n_east, n_z = res_model.shape
+    for j in prange(n_north):
+        for i in range(n_east):
+            top = top_surface[j, i]
+            bottom = bottom_surface[j, i]
+            for k in range(n_z):
+                if gcz[k] > top and gcz[k] <= bottom:
+                    res_model[j, i, k] = resistivity_value
+
+
+_assign_between_surfaces_kernel = compile_kernel(_assign_between_surfaces)
+# loading the compiled kernel takes ~0.1 s, below this many model cells the
+# numpy mask is faster
+_ASSIGN_KERNEL_MIN_CELLS = 50000000
+
+
 class Model(object):
     """
     make and read a FE mesh grid
@@ -346,8 +370,7 @@ class Model(object):
     def nodes_east(self, nodes):
         nodes = np.array(nodes)
         self._nodes_east = nodes
-        self.grid_east = np.array([nodes[0:ii].sum()#-nodes.sum() / 2 + 
-                                   for ii in range(nodes.size+1)])# + [shift])#[nodes.sum() / 2]
+        self.grid_east = np.concatenate(([0], np.cumsum(nodes)))
 
     # Nodes North
     @property
@@ -361,8 +384,7 @@ class Model(object):
     def nodes_north(self, nodes):
         nodes = np.array(nodes)
         self._nodes_north = nodes
-        self.grid_north = np.array([nodes[0:ii].sum()#-nodes.sum() / 2 + 
-                                    for ii in range(nodes.size+1)])# + [shift])#[nodes.sum() / 2]
+        self.grid_north = np.concatenate(([0], np.cumsum(nodes)))
 
     @property
     def nodes_z(self):
@@ -376,7 +398,7 @@ class Model(object):
     def nodes_z(self, nodes):
         nodes = np.array(nodes)
         self._nodes_z = nodes
-        self.grid_z = np.array([nodes[0:ii].sum() for ii in range(nodes.size)] + [nodes.sum()])
+        self.grid_z = np.concatenate(([0], np.cumsum(nodes)))
 
     def make_mesh(self):
         """
@@ -463,12 +485,12 @@ class Model(object):
             raise NameError("Padding method \"{}\" is not supported".format(self.pad_method))
 
         # make the horizontal grid
-        self.grid_east = np.append(np.append(-1 * padding_east[::-1] + inner_east.min(),
-                                             inner_east),
-                                   padding_east + inner_east.max())
-        self.grid_north = np.append(np.append(-1 * padding_north[::-1] + inner_north.min(),
-                                              inner_north),
-                                    padding_north + inner_north.max())
+        self.grid_east = np.concatenate((-1 * padding_east[::-1] + inner_east.min(),
+                                         inner_east,
+                                         padding_east + inner_east.max()))
+        self.grid_north = np.concatenate((-1 * padding_north[::-1] + inner_north.min(),
+                                          inner_north,
+                                          padding_north + inner_north.max()))
 
         # --> need to make sure none of the stations lie on the nodes
         for s_east in sorted(self.station_locations.rel_east):
@@ -545,9 +567,9 @@ class Model(object):
         print('\t\tn-s = {0}'.format(self.grid_north.size), file=file)
         print('\t\tz  = {0} (without 7 air layers)'.format(self.grid_z.size), file=file)
         print('\tExtensions: ', file=file)
-        print('\t\te-w = {0:.1f} (m)'.format(self.nodes_east.__abs__().sum()), file=file)
-        print('\t\tn-s = {0:.1f} (m)'.format(self.nodes_north.__abs__().sum()), file=file)
-        print('\t\t0-z = {0:.1f} (m)'.format(self.nodes_z.__abs__().sum()), file=file)
+        print('\t\te-w = {0:.1f} (m)'.format(self.nodes_east.sum()), file=file)
+        print('\t\tn-s = {0:.1f} (m)'.format(self.nodes_north.sum()), file=file)
+        print('\t\t0-z = {0:.1f} (m)'.format(self.nodes_z.sum()), file=file)
 
         print('\tStations rotated by: {0:.1f} deg clockwise positive from N'.format(self.mesh_rotation_angle),
               file=file)
@@ -614,8 +636,7 @@ class Model(object):
         z_nodes = np.hstack([[self.z1_layer] * add_air, z_nodes])
 
         # make an array of sum values as coordinates of the horizontal lines
-        z_grid = np.array([z_nodes[:ii].sum()
-                           for ii in range(z_nodes.shape[0] + 1)])
+        z_grid = np.concatenate(([0], np.cumsum(z_nodes)))
 
         # z_grid point at zero level
         # wrong: the following line does not make any sense if no air layer was added above.
@@ -658,7 +679,7 @@ class Model(object):
         z_nodes = np.hstack([[self.z1_layer] * self.n_air_layers, z_nodes])
 
         # make an array of absolute values
-        z_grid = np.array([z_nodes[:ii].sum() for ii in range(z_nodes.shape[0] + 1)])
+        z_grid = np.concatenate(([0], np.cumsum(z_nodes)))
 
         return z_nodes, z_grid
     
@@ -685,10 +706,16 @@ class Model(object):
                            (len(gcz), gcz))
 
         # assign resistivity value
-        for j in range(len(self.res_model)):
-            for i in range(len(self.res_model[j])):
-                ii = np.where((gcz > top_surface[j, i]) & (gcz <= bottom_surface[j, i]))[0]
-                self.res_model[j, i, ii] = resistivity_value
+        if _assign_between_surfaces_kernel is not None and \
+                self.res_model.size >= _ASSIGN_KERNEL_MIN_CELLS:
+            _assign_between_surfaces_kernel(self.res_model, gcz,
+                                            np.asarray(top_surface, dtype=np.float),
+                                            np.asarray(bottom_surface, dtype=np.float),
+                                            resistivity_value)
+        else:
+            top_surface = np.asarray(top_surface)[:, :, np.newaxis]
+            bottom_surface = np.asarray(bottom_surface)[:, :, np.newaxis]
+            self.res_model[(gcz > top_surface) & (gcz <= bottom_surface)] = resistivity_value
 
 
 
@@ -761,37 +788,29 @@ class Model(object):
                     c=marker_color,
                     s=marker_size)
 
-        east_line_xlist = []
-        east_line_ylist = []
+        # build the grid lines as (n_lines, 2, 2) segment arrays and draw
+        # each family with a single LineCollection
         north_min = self.grid_north.min()
         north_max = self.grid_north.max()
-        for xx in self.grid_east:
-            east_line_xlist.extend([xx * cos_ang + north_min * sin_ang,
-                                    xx * cos_ang + north_max * sin_ang])
-            east_line_xlist.append(None)
-            east_line_ylist.extend([-xx * sin_ang + north_min * cos_ang,
-                                    -xx * sin_ang + north_max * cos_ang])
-            east_line_ylist.append(None)
-        ax1.plot(east_line_xlist,
-                 east_line_ylist,
-                 lw=line_width,
-                 color=line_color)
+        east_segs = np.empty((self.grid_east.size, 2, 2))
+        east_segs[:, 0, 0] = self.grid_east * cos_ang + north_min * sin_ang
+        east_segs[:, 1, 0] = self.grid_east * cos_ang + north_max * sin_ang
+        east_segs[:, 0, 1] = -self.grid_east * sin_ang + north_min * cos_ang
+        east_segs[:, 1, 1] = -self.grid_east * sin_ang + north_max * cos_ang
+        ax1.add_collection(LineCollection(east_segs,
+                                          linewidths=line_width,
+                                          colors=line_color))
 
-        north_line_xlist = []
-        north_line_ylist = []
         east_max = self.grid_east.max()
         east_min = self.grid_east.min()
-        for yy in self.grid_north:
-            north_line_xlist.extend([east_min * cos_ang + yy * sin_ang,
-                                     east_max * cos_ang + yy * sin_ang])
-            north_line_xlist.append(None)
-            north_line_ylist.extend([-east_min * sin_ang + yy * cos_ang,
-                                     -east_max * sin_ang + yy * cos_ang])
-            north_line_ylist.append(None)
-        ax1.plot(north_line_xlist,
-                 north_line_ylist,
-                 lw=line_width,
-                 color=line_color)
+        north_segs = np.empty((self.grid_north.size, 2, 2))
+        north_segs[:, 0, 0] = east_min * cos_ang + self.grid_north * sin_ang
+        north_segs[:, 1, 0] = east_max * cos_ang + self.grid_north * sin_ang
+        north_segs[:, 0, 1] = -east_min * sin_ang + self.grid_north * cos_ang
+        north_segs[:, 1, 1] = -east_max * sin_ang + self.grid_north * cos_ang
+        ax1.add_collection(LineCollection(north_segs,
+                                          linewidths=line_width,
+                                          colors=line_color))
 
         if east_limits is None:
             ax1.set_xlim(plot_east.min() - 10 * self.cell_size_east,
@@ -813,31 +832,21 @@ class Model(object):
         ax2 = fig.add_subplot(1, 2, 2, aspect='auto', sharex=ax1)
 
         # plot the grid
-        east_line_xlist = []
-        east_line_ylist = []
-        for xx in self.grid_east:
-            east_line_xlist.extend([xx, xx])
-            east_line_xlist.append(None)
-            east_line_ylist.extend([0,
-                                    self.grid_z.max()])
-            east_line_ylist.append(None)
-        ax2.plot(east_line_xlist,
-                 east_line_ylist,
-                 lw=line_width,
-                 color=line_color)
-
-        z_line_xlist = []
-        z_line_ylist = []
-        for zz in self.grid_z:
-            z_line_xlist.extend([self.grid_east.min(),
-                                 self.grid_east.max()])
-            z_line_xlist.append(None)
-            z_line_ylist.extend([zz, zz])
-            z_line_ylist.append(None)
-        ax2.plot(z_line_xlist,
-                 z_line_ylist,
-                 lw=line_width,
-                 color=line_color)
+        east_segs = np.empty((self.grid_east.size, 2, 2))
+        east_segs[:, :, 0] = self.grid_east[:, np.newaxis]
+        east_segs[:, 0, 1] = 0
+        east_segs[:, 1, 1] = self.grid_z.max()
+        ax2.add_collection(LineCollection(east_segs,
+                                          linewidths=line_width,
+                                          colors=line_color))
+
+        z_segs = np.empty((self.grid_z.size, 2, 2))
+        z_segs[:, 0, 0] = self.grid_east.min()
+        z_segs[:, 1, 0] = self.grid_east.max()
+        z_segs[:, :, 1] = self.grid_z[:, np.newaxis]
+        ax2.add_collection(LineCollection(z_segs,
+                                          linewidths=line_width,
+                                          colors=line_color))
 
         # --> plot stations
         ax2.scatter(plot_east,
@@ -1145,77 +1154,76 @@ class Model(object):
 
         # get resistivity model
         if self.res_model is None:
-            self.res_model = np.zeros((self.nodes_north.size,
-                                       self.nodes_east.size,
-                                       self.nodes_z.size))
-            self.res_model[:, :, :] = self.res_initial_value
+            self.res_model = np.full((self.nodes_north.size,
+                                      self.nodes_east.size,
+                                      self.nodes_z.size),
+                                     self.res_initial_value, dtype=np.float)
 
         elif type(self.res_model) in [float, int]:
             self.res_initial_value = self.res_model
-            self.res_model = np.zeros((self.nodes_north.size,
-                                       self.nodes_east.size,
-                                       self.nodes_z.size))
-            self.res_model[:, :, :] = self.res_initial_value
-
-        # --> write file
-        ifid = file(self.model_fn, 'w')
-        ifid.write('# {0}\n'.format(self.title.upper()))
-        ifid.write('{0:>5}{1:>5}{2:>5}{3:>5} {4}\n'.format(self.nodes_north.size,
-                                                           self.nodes_east.size,
-                                                           self.nodes_z.size,
-                                                           0,
-                                                           self.res_scale.upper()))
+            self.res_model = np.full((self.nodes_north.size,
+                                      self.nodes_east.size,
+                                      self.nodes_z.size),
+                                     self.res_initial_value, dtype=np.float)
+
+        # --> build the file in memory and write it out in one go
+        mlines = ['# {0}\n'.format(self.title.upper()),
+                  '{0:>5}{1:>5}{2:>5}{3:>5} {4}\n'.format(self.nodes_north.size,
+                                                         self.nodes_east.size,
+                                                         self.nodes_z.size,
+                                                         0,
+                                                         self.res_scale.upper())]
 
         # write S --> N node block
         for ii, nnode in enumerate(self.nodes_north):
-            ifid.write('{0:>12.3f}'.format(abs(nnode)))
-
-        ifid.write('\n')
+            mlines.append('{0:>12.3f}'.format(abs(nnode)))
+        mlines.append('\n')
 
         # write W --> E node block
         for jj, enode in enumerate(self.nodes_east):
-            ifid.write('{0:>12.3f}'.format(abs(enode)))
-        ifid.write('\n')
+            mlines.append('{0:>12.3f}'.format(abs(enode)))
+        mlines.append('\n')
 
         # write top --> bottom node block
         for kk, zz in enumerate(self.nodes_z):
-            ifid.write('{0:>12.3f}'.format(abs(zz)))
-        ifid.write('\n')
+            mlines.append('{0:>12.3f}'.format(abs(zz)))
+        mlines.append('\n')
 
         # write the resistivity in log e format
-        if self.res_scale.lower() == 'loge':
+        res_scale = self.res_scale.lower()
+        if res_scale == 'loge':
             write_res_model = np.log(self.res_model[::-1, :, :])
-        elif self.res_scale.lower() == 'log' or \
-                        self.res_scale.lower() == 'log10':
+        elif res_scale in ('log', 'log10'):
             write_res_model = np.log10(self.res_model[::-1, :, :])
-        elif self.res_scale.lower() == 'linear':
+        elif res_scale == 'linear':
             write_res_model = self.res_model[::-1, :, :]
         else:
             raise ModelError("resistivity scale \"{}\" is not supported.".format(self.res_scale))
 
-        # write out the layers from resmodel
+        # write out the layers from resmodel, formatting a whole layer
+        # (one line of N-->S values per east index) at a time
+        layer_fmt = ('%13.5E' * self.nodes_north.size + '\n') * self.nodes_east.size
         for zz in range(self.nodes_z.size):
-            ifid.write('\n')
-            for ee in range(self.nodes_east.size):
-                for nn in range(self.nodes_north.size):
-                    ifid.write('{0:>13.5E}'.format(write_res_model[nn, ee, zz]))
-                ifid.write('\n')
+            mlines.append('\n')
+            mlines.append(layer_fmt % tuple(write_res_model[:, :, zz].T.ravel()))
 
         if self.grid_center is None:
             # compute grid center
-            center_east = -self.nodes_east.__abs__().sum() / 2
-            center_north = -self.nodes_north.__abs__().sum() / 2
+            center_east = -0.5 * self.nodes_east.sum()
+            center_north = -0.5 * self.nodes_north.sum()
             center_z = 0
             self.grid_center = np.array([center_north, center_east, center_z])
 
-        ifid.write('\n{0:>16.3f}{1:>16.3f}{2:>16.3f}\n'.format(self.grid_center[0],
-                                                               self.grid_center[1], self.grid_center[2]))
+        mlines.append('\n{0:>16.3f}{1:>16.3f}{2:>16.3f}\n'.format(self.grid_center[0],
+                                                                  self.grid_center[1], self.grid_center[2]))
 
         if self.mesh_rotation_angle is None:
-            ifid.write('{0:>9.3f}\n'.format(0))
+            mlines.append('{0:>9.3f}\n'.format(0))
         else:
-            ifid.write('{0:>9.3f}\n'.format(self.mesh_rotation_angle))
-        ifid.close()
+            mlines.append('{0:>9.3f}\n'.format(self.mesh_rotation_angle))
+
+        with open(self.model_fn, 'w') as ifid:
+            ifid.write(''.join(mlines))
 
         self._logger.info('Wrote file to: {0}'.format(self.model_fn))
 
@@ -1276,64 +1284,53 @@ class Model(object):
 
         self.save_path = os.path.dirname(self.model_fn)
 
-        ifid = file(self.model_fn, 'r')
-        ilines = ifid.readlines()
-        ifid.close()
-
-        self.title = ilines[0].strip()
-
-        # get size of dimensions, remembering that x is N-S, y is E-W, z is + down
-        nsize = ilines[1].strip().split()
-        n_north = int(nsize[0])
-        n_east = int(nsize[1])
-        n_z = int(nsize[2])
-        log_yn = nsize[4]
-
-        # get nodes
-        self.nodes_north = np.array([np.float(nn)
-                                     for nn in ilines[2].strip().split()])
-        self.nodes_east = np.array([np.float(nn)
-                                    for nn in ilines[3].strip().split()])
-        self.nodes_z = np.array([np.float(nn)
-                                 for nn in ilines[4].strip().split()])
-
-        self.res_model = np.zeros((n_north, n_east, n_z))
-
-        # get model
-        count_z = 0
-        line_index = 6
-        count_e = 0
-        while count_z < n_z:
-            iline = ilines[line_index].strip().split()
-            # blank lines spit the depth blocks, use those as a marker to
-            # set the layer number and start a new block
-            if len(iline) == 0:
-                count_z += 1
-                count_e = 0
-                line_index += 1
-            # 3D grid model files don't have a space at the end
-            # additional condition to account for this.
-            elif (len(iline) == 3) & (count_z == n_z - 1):
-                count_z += 1
-                count_e = 0
-                line_index += 1
-            # each line in the block is a line of N-->S values for an east value
-            else:
-                north_line = np.array([float(nres) for nres in iline])
+        # stream the file rather than holding every line in memory
+        with open(self.model_fn, 'r') as ifid:
+            self.title = ifid.readline().strip()
+
+            # get size of dimensions, remembering that x is N-S, y is E-W, z is + down
+            nsize = ifid.readline().strip().split()
+            n_north = int(nsize[0])
+            n_east = int(nsize[1])
+            n_z = int(nsize[2])
+            log_yn = nsize[4].lower()
+
+            # get nodes
+            self.nodes_north = np.array([np.float(nn)
+                                         for nn in ifid.readline().strip().split()])
+            self.nodes_east = np.array([np.float(nn)
+                                        for nn in ifid.readline().strip().split()])
+            self.nodes_z = np.array([np.float(nn)
+                                     for nn in ifid.readline().strip().split()])
+
+            self.res_model = np.zeros((n_north, n_east, n_z))
+
+            # get model, one depth block at a time.  Each non-blank line is a
+            # line of N-->S values for an east value, blank lines split the
+            # depth blocks.  Parse each block at once rather than converting
+            # value by value.
+            for zz in range(n_z):
+                block_lines = []
+                while len(block_lines) < n_east:
+                    iline = ifid.readline()
+                    if not iline:
+                        raise ModelError('{0} ended before all {1} model layers '
+                                         'were read'.format(self.model_fn, n_z))
+                    if iline.strip():
+                        block_lines.append(iline)
+                block = np.fromstring(' '.join(block_lines), sep=' ')
 
                 # Need to be sure that the resistivity array matches
                 # with the grids, such that the first index is the
                 # furthest south
-                self.res_model[:, count_e, count_z] = north_line[::-1]
+                self.res_model[:, :, zz] = block.reshape(n_east, n_north)[:, ::-1].T
 
-                count_e += 1
-                line_index += 1
-
-        # --> get grid center and rotation angle
-        if len(ilines) > line_index:
-            for iline in ilines[line_index:]:
-                print(iline)
+            # --> get grid center and rotation angle
+            for iline in ifid:
                 ilist = iline.strip().split()
+                if len(ilist) == 0:
+                    continue
+                print(iline)
                 # grid center
                 if len(ilist) == 3:
                     self.grid_center = np.array(ilist, dtype=np.float)
@@ -1344,10 +1341,11 @@ class Model(object):
                     pass
 
         # --> make sure the resistivity units are in linear Ohm-m
-        if log_yn.lower() == 'loge':
-            self.res_model = np.e ** self.res_model
-        elif log_yn.lower() == 'log' or log_yn.lower() == 'log10':
-            self.res_model = 10 ** self.res_model
+        # convert in place, res_model was freshly allocated above
+        if log_yn == 'loge':
+            np.exp(self.res_model, out=self.res_model)
+        elif log_yn in ('log', 'log10'):
+            np.power(10., self.res_model, out=self.res_model)
 
         # center the grids
         if self.grid_center is None:
@@ -1385,14 +1383,12 @@ class Model(object):
         ws_model_obj.read_model_file()
 
         # set similar attributes
-        for ws_key in ws_model_obj.__dict__.keys():
-            for md_key in self.__dict__.keys():
-                if ws_key == md_key:
-                    setattr(self, ws_key, ws_model_obj.__dict__[ws_key])
+        for key in set(ws_model_obj.__dict__.keys()) & set(self.__dict__.keys()):
+            setattr(self, key, ws_model_obj.__dict__[key])
 
         # compute grid center
-        center_east = -self.nodes_east.__abs__().sum() / 2
-        center_north = -self.nodes_north.__abs__().sum() / 2
+        center_east = -0.5 * self.nodes_east.sum()
+        center_north = -0.5 * self.nodes_north.sum()
         center_z = 0
         self.grid_center = np.array([center_north, center_east, center_z])
 
@@ -1509,13 +1505,13 @@ class Model(object):
         
         gz = -1.*self.grid_z[:nzin - clip[2]] - origin[2]
         
-        gxm, gzm = np.meshgrid(gx, gz)
-        gym, gzm = np.meshgrid(gy, gz)
-        
-        
-        gxm = gxm.reshape(len(gz),len(gy),len(gx[0])).transpose(1,2,0)
-        gym = gym.reshape(len(gz),len(gy),len(gx[0])).transpose(1,2,0)
-        gzm = gzm.reshape(len(gz),len(gy),len(gx[0])).transpose(1,2,0)
+        # broadcast the (north, east) plane and the z edges to the full
+        # (north, east, z) grid as read-only views rather than allocating
+        # three dense 3-D meshgrids
+        grid_shape = gx.shape + gz.shape
+        gxm = np.broadcast_to(gx[:, :, np.newaxis], grid_shape)
+        gym = np.broadcast_to(gy[:, :, np.newaxis], grid_shape)
+        gzm = np.broadcast_to(gz, grid_shape)
         
         gridedges = (gxm,gym,gzm)
 
@@ -1552,9 +1548,22 @@ class Model(object):
         # get resistivity model values
         self.res_model = sgObj.resistivity
 
-        # get nodes and grid locations
-        grideast, gridnorth, gridz = [
-            np.unique(sgObj.grid_xyz[i]) for i in range(3)]
+        # get nodes and grid locations. For an orthogonal grid each coordinate
+        # only varies along one axis (north, east, z ordering), so take a 1-D
+        # slice along that axis rather than running np.unique over the full
+        # 3-D array. Fall back to np.unique if the grid is not orthogonal.
+        grid_edges = []
+        for arr, axis in zip(sgObj.grid_xyz, [1, 0, 2]):
+            index = [0, 0, 0]
+            index[axis] = slice(None)
+            edges = arr[tuple(index)]
+            shape = [1, 1, 1]
+            shape[axis] = edges.size
+            if np.array_equal(arr, np.broadcast_to(edges.reshape(shape), arr.shape)):
+                grid_edges.append(np.sort(edges))
+            else:
+                grid_edges.append(np.unique(arr))
+        grideast, gridnorth, gridz = grid_edges
         # check if sgrid is positive up and convert to positive down if it is
         # (ModEM grid is positive down)
         if sgrid_positive_up:
@@ -1605,9 +1614,14 @@ class Model(object):
         # number of vertical layers
         self.n_layers = len(self.grid_z) - 1
 
-        # number of air layers
-        self.n_airlayers = sum(
-            np.amax(self.res_model, axis=(0, 1)) > 0.9 * air_resistivity)
+        # number of air layers, air is always at the top of the model so
+        # count layers down to the first one that is not air
+        layer_max = self.res_model.max(axis=(0, 1))
+        not_air = layer_max <= 0.9 * air_resistivity
+        if not_air.any():
+            self.n_airlayers = int(np.argmax(not_air))
+        else:
+            self.n_airlayers = not_air.size
 
         # sea level in grid_z coordinates, calculate and adjust centre
         self.sea_level = self.grid_z[self.n_airlayers]
@@ -1763,7 +1777,7 @@ class Model(object):
                                                              self.n_air_layers,
                                                              increment_factor=0.999)[::-1]
             # sum to get grid cell locations
-            new_airlayers = np.array([new_air_nodes[:ii].sum() for ii in range(len(new_air_nodes) + 1)])
+            new_airlayers = np.concatenate(([0], np.cumsum(new_air_nodes)))
             # maximum topography cell on the grid
             topo_max_grid = topo_core_min + new_airlayers[-1]
             # round to nearest whole number and convert subtract the max elevation (so that sea level is at topo_core_min)
@@ -1784,9 +1798,10 @@ class Model(object):
         self.grid_center[2] = self.grid_z[0]
 
         # update the resistivity model
-        new_res_model = np.ones((self.nodes_north.size,
+        new_res_model = np.full((self.nodes_north.size,
                                  self.nodes_east.size,
-                                 self.nodes_z.size)) * self.res_initial_value
+                                 self.nodes_z.size),
+                                self.res_initial_value, dtype=np.float)
         new_res_model[:, :, self.n_air_layers:] = self.res_model
         self.res_model = new_res_model
 
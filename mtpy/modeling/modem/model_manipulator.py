@@ -9,11 +9,13 @@ ModEM
 # revised by AK 2017 to bring across functionality from ak branch
 
 """
+from __future__ import print_function
 
 import os
 
 import numpy as np
 from matplotlib import cm as cm, pyplot as plt, colorbar as mcb, colors as colors, widgets as widgets
+from matplotlib.collections import LineCollection
 
 from mtpy.imaging import mtplottools as mtplottools
 from .data import Data
@@ -53,6 +55,7 @@ class ModelManipulator(Model):
     ax2                 matplotlib.axes instance of colorbar
     cb                  matplotlib.colorbar instance for colorbar
     cid_depth           matplotlib.canvas.connect for depth
+    cid_draw            matplotlib.canvas.connect for draw events
     cmap                matplotlib.colormap instance
     cmax                maximum value of resistivity for colorbar. (linear)
     cmin                minimum value of resistivity for colorbar (linear)
@@ -60,30 +63,25 @@ class ModelManipulator(Model):
     depth_index         integer value of depth slice for plotting
     dpi                 resolution of figure in dots-per-inch
     dscale              depth scaling, computed internally
-    east_line_xlist     list of east mesh lines for faster plotting
-    east_line_ylist     list of east mesh lines for faster plotting
     fdict               dictionary of font properties
     fig                 matplotlib.figure instance
     fig_num              number of figure instance
     fig_size             size of figure in inches
     font_size           size of font in points
     grid_east           location of east nodes in relative coordinates
+    grid_lines          matplotlib.collections.LineCollection of mesh lines
     grid_north          location of north nodes in relative coordinates
     grid_z              location of vertical nodes in relative coordinates
     initial_fn          full path to initial file
     m_height            mean height of horizontal cells
     m_width             mean width of horizontal cells
     map_scale            [ 'm' | 'km' ] scale of map
-    mesh_east           np.meshgrid of east, north
-    mesh_north          np.meshgrid of east, north
     mesh_plot           matplotlib.axes.pcolormesh instance
     model_fn            full path to model file
     new_initial_fn      full path to new initial file
     nodes_east          spacing between east nodes
     nodes_north         spacing between north nodes
     nodes_z             spacing between vertical nodes
-    north_line_xlist    list of coordinates of north nodes for faster plotting
-    north_line_ylist    list of coordinates of north nodes for faster plotting
     plot_yn             [ 'y' | 'n' ] plot on instantiation
     radio_res           matplotlib.widget.radio instance for change resistivity
     rect_selector       matplotlib.widget.rect_selector
@@ -142,24 +140,32 @@ class ModelManipulator(Model):
         self.ax1 = None
         self.ax2 = None
         self.cb = None
-        self.east_line_xlist = None
-        self.east_line_ylist = None
-        self.north_line_xlist = None
-        self.north_line_ylist = None
+        self.grid_lines = None
 
         # make a default resistivity list to change values
         self._res_sea = 0.3
         self._res_air = 1E12
         self.res_dict = None
-        self.res_list = kwargs.pop('res_list', None)
-        if self.res_list is None:
-            self.set_res_list(np.array([self._res_sea, 1, 10, 50, 100, 500,
-                                        1000, 5000],
-                                       dtype=np.float))
+        res_list = kwargs.pop('res_list', None)
+        if res_list is None:
+            res_list = np.array([self._res_sea, 1, 10, 50, 100, 500, 1000,
+                                 5000],
+                                dtype=np.float64)
+        self.set_res_list(res_list)
 
         # set initial resistivity value
         self.res_value = self.res_list[0]
         self.cov_arr = None
+        self._log_res = None
+        self._ge_s = None
+        self._gn_s = None
+        self._grid_z_s = None
+        self._grid_segs = None
+        self._grid_segs_key = None
+        self._sta_e = None
+        self._sta_n = None
+        self._sta_scatter = None
+        self._bg = None
 
         # --> set map limits
         self.xlimits = kwargs.pop('xlimits', None)
@@ -193,8 +199,15 @@ class ModelManipulator(Model):
         """
         self.res_list = res_list
         # make a dictionary of values to write to file.
-        self.res_dict = dict([(res, ii)
-                              for ii, res in enumerate(self.res_list, 1)])
+        self.res_dict = {res: ii
+                         for ii, res in enumerate(self.res_list, 1)}
+
+        # colorbar limits and tick labels only depend on res_list
+        self.cmin = np.floor(np.log10(min(self.res_list)))
+        self.cmax = np.ceil(np.log10(max(self.res_list)))
+        self._cb_ticks = np.arange(self.cmin, self.cmax + 1)
+        self._cb_ticklabels = [mtplottools.labeldict[cc]
+                               for cc in self._cb_ticks]
         if self.fig is not None:
             plt.close()
             self.plot()
@@ -213,7 +226,8 @@ class ModelManipulator(Model):
         # --> read in model file
         self.read_model_file()
 
-        self.cov_arr = np.ones_like(self.res_model)
+        # covariance masks only hold small integer codes (0 air, 9 sea)
+        self.cov_arr = np.ones(self.res_model.shape, dtype=np.int8)
 
         # --> read in data file if given
         if self.data_fn is not None:
@@ -223,6 +237,10 @@ class ModelManipulator(Model):
             # get station locations
             self.station_east = md_data.station_locations.rel_east
             self.station_north = md_data.station_locations.rel_north
+            self._sta_e = self.station_east / self.dscale
+            self._sta_n = self.station_north / self.dscale
+            if self._sta_scatter is not None:
+                self._update_stations()
 
         # get cell block sizes
         self.m_height = np.median(self.nodes_north[5:-5]) / self.dscale
@@ -231,6 +249,18 @@ class ModelManipulator(Model):
         # make a copy of original in case there are unwanted changes
         self.res_copy = self.res_model.copy()
 
+        # keep log10 of the model for plotting as (z, north, east) so each
+        # layer is contiguous, single precision is plenty for the colormap
+        # and halves the bytes moved on redraws and layer copies, edits
+        # update it in place
+        self._log_res = np.ascontiguousarray(
+            np.log10(self.res_model).transpose(2, 0, 1), dtype=np.float32)
+
+        # grid in plotting units, used for drawing and picking cells
+        self._ge_s = self.grid_east / self.dscale
+        self._gn_s = self.grid_north / self.dscale
+        self._grid_z_s = self.grid_z / self.dscale
+
     # ---plot model-------------------------------------------------------------
     def plot(self):
         """
@@ -250,33 +280,35 @@ class ModelManipulator(Model):
         # make sure there is a model to plot
         if self.res_model is None:
             self.get_model()
-
-        self.cmin = np.floor(np.log10(min(self.res_list)))
-        self.cmax = np.ceil(np.log10(max(self.res_list)))
+        else:
+            self._log_res = np.ascontiguousarray(
+                np.log10(self.res_model).transpose(2, 0, 1), dtype=np.float32)
+            self._ge_s = self.grid_east / self.dscale
+            self._gn_s = self.grid_north / self.dscale
+            self._grid_z_s = self.grid_z / self.dscale
+            if self.station_east is not None:
+                self._sta_e = self.station_east / self.dscale
+                self._sta_n = self.station_north / self.dscale
 
         # -->Plot properties
         plt.rcParams['font.size'] = self.font_size
 
         # need to add an extra row and column to east and north to make sure
         # all is plotted see pcolor for details.
-        plot_east = self.grid_east / self.dscale
-        plot_north = self.grid_north / self.dscale
-
-        # make a mesh grid for plotting
-        # the 'ij' makes sure the resulting grid is in east, north
-        self.mesh_east, self.mesh_north = np.meshgrid(plot_east,
-                                                      plot_north,
-                                                      indexing='ij')
+        plot_east = self._ge_s
+        plot_north = self._gn_s
 
         self.fig = plt.figure(self.fig_num, self.fig_size, dpi=self.fig_dpi)
         plt.clf()
         self.ax1 = self.fig.add_subplot(1, 1, 1, aspect='equal')
 
-        # transpose to make x--east and y--north
-        plot_res = np.log10(self.res_model[:, :, self.depth_index].T)
+        # rows are north and columns east, matching the 1-D edges
+        plot_res = self._log_res[self.depth_index]
 
-        self.mesh_plot = self.ax1.pcolormesh(self.mesh_east,
-                                             self.mesh_north,
+        # pcolormesh takes the 1-D cell edges directly, no need for a full
+        # mesh grid
+        self.mesh_plot = self.ax1.pcolormesh(plot_east,
+                                             plot_north,
                                              plot_res,
                                              cmap=self.cmap,
                                              vmin=self.cmin,
@@ -287,28 +319,30 @@ class ModelManipulator(Model):
             self.mesh_plot.figure.canvas.mpl_connect('key_press_event',
                                                      self._on_key_callback)
 
+        # keep a copy of the map after each full draw to blit edits onto
+        self.cid_draw = self.fig.canvas.mpl_connect('draw_event',
+                                                    self._on_draw_callback)
+
         # plot the stations
         if self.station_east is not None:
-            for ee, nn in zip(self.station_east, self.station_north):
-                self.ax1.text(ee / self.dscale, nn / self.dscale,
-                              '*',
-                              verticalalignment='center',
-                              horizontalalignment='center',
-                              fontdict={'size': self.font_size - 2,
-                                        'weight': 'bold'})
+            self._sta_scatter = self.ax1.scatter(self._sta_e,
+                                                 self._sta_n,
+                                                 marker='*',
+                                                 s=(self.font_size - 2) ** 2,
+                                                 c='k')
 
         # set axis properties
         if self.xlimits is not None:
             self.ax1.set_xlim(self.xlimits)
         else:
-            self.ax1.set_xlim(xmin=self.grid_east.min() / self.dscale,
-                              xmax=self.grid_east.max() / self.dscale)
+            self.ax1.set_xlim(xmin=self._ge_s.min(),
+                              xmax=self._ge_s.max())
 
         if self.ylimits is not None:
             self.ax1.set_ylim(self.ylimits)
         else:
-            self.ax1.set_ylim(ymin=self.grid_north.min() / self.dscale,
-                              ymax=self.grid_north.max() / self.dscale)
+            self.ax1.set_ylim(ymin=self._gn_s.min(),
+                              ymax=self._gn_s.max())
 
         # self.ax1.xaxis.set_minor_locator(MultipleLocator(100*1./dscale))
         # self.ax1.yaxis.set_minor_locator(MultipleLocator(100*1./dscale))
@@ -318,38 +352,35 @@ class ModelManipulator(Model):
         self.ax1.set_xlabel('Easting (' + self.map_scale + ')',
                             fontdict=self.fdict)
 
-        depth_title = self.grid_z[self.depth_index] / self.dscale
+        depth_title = self._grid_z_s[self.depth_index]
 
         self.ax1.set_title('Depth = {:.3f} '.format(depth_title) + \
                            '(' + self.map_scale + ')',
                            fontdict=self.fdict)
 
-        # plot the grid if desired
-        self.east_line_xlist = []
-        self.east_line_ylist = []
-        for xx in self.grid_east:
-            self.east_line_xlist.extend([xx / self.dscale, xx / self.dscale])
-            self.east_line_xlist.append(None)
-            self.east_line_ylist.extend([self.grid_north.min() / self.dscale,
-                                         self.grid_north.max() / self.dscale])
-            self.east_line_ylist.append(None)
-        self.ax1.plot(self.east_line_xlist,
-                      self.east_line_ylist,
-                      lw=.25,
-                      color='k')
-
-        self.north_line_xlist = []
-        self.north_line_ylist = []
-        for yy in self.grid_north:
-            self.north_line_xlist.extend([self.grid_east.min() / self.dscale,
-                                          self.grid_east.max() / self.dscale])
-            self.north_line_xlist.append(None)
-            self.north_line_ylist.extend([yy / self.dscale, yy / self.dscale])
-            self.north_line_ylist.append(None)
-        self.ax1.plot(self.north_line_xlist,
-                      self.north_line_ylist,
-                      lw=.25,
-                      color='k')
+        # plot the grid, build the grid lines as (n_lines, 2, 2) segment
+        # arrays and draw them with a single LineCollection, the segments
+        # are only rebuilt when a new grid has been read in
+        if self._grid_segs_key is None or \
+                self._grid_segs_key[0] is not self.grid_east or \
+                self._grid_segs_key[1] is not self.grid_north:
+            east_segs = np.empty((plot_east.size, 2, 2))
+            east_segs[:, :, 0] = plot_east[:, np.newaxis]
+            east_segs[:, 0, 1] = plot_north.min()
+            east_segs[:, 1, 1] = plot_north.max()
+
+            north_segs = np.empty((plot_north.size, 2, 2))
+            north_segs[:, 0, 0] = plot_east.min()
+            north_segs[:, 1, 0] = plot_east.max()
+            north_segs[:, :, 1] = plot_north[:, np.newaxis]
+
+            self._grid_segs = np.concatenate((east_segs, north_segs))
+            self._grid_segs_key = (self.grid_east, self.grid_north)
+
+        self.grid_lines = LineCollection(self._grid_segs,
+                                         linewidths=.25,
+                                         colors='k')
+        self.ax1.add_collection(self.grid_lines)
 
         # plot the colorbar
         #        self.ax2 = mcb.make_axes(self.ax1, orientation='vertical', shrink=.35)
@@ -363,9 +394,8 @@ class ModelManipulator(Model):
 
         self.cb.set_label('Resistivity ($\Omega \cdot$m)',
                           fontdict={'size': self.font_size})
-        self.cb.set_ticks(np.arange(self.cmin, self.cmax + 1))
-        self.cb.set_ticklabels([mtplottools.labeldict[cc]
-                                for cc in np.arange(self.cmin, self.cmax + 1)])
+        self.cb.set_ticks(self._cb_ticks)
+        self.cb.set_ticklabels(self._cb_ticklabels)
 
         # make a resistivity radio button
         # resrb = self.fig.add_axes([.85,.1,.1,.2])
@@ -394,76 +424,55 @@ class ModelManipulator(Model):
 
     def redraw_plot(self):
         """
-        redraws the plot
+        redraws the plot, only the colors of the mesh and the title change so
+        the existing artists are updated in place
         """
 
-        current_xlimits = self.ax1.get_xlim()
-        current_ylimits = self.ax1.get_ylim()
-
-        self.ax1.cla()
-
-        plot_res = np.log10(self.res_model[:, :, self.depth_index].T)
-
-        self.mesh_plot = self.ax1.pcolormesh(self.mesh_east,
-                                             self.mesh_north,
-                                             plot_res,
-                                             cmap=self.cmap,
-                                             vmin=self.cmin,
-                                             vmax=self.cmax)
-
-        # plot the stations
-        if self.station_east is not None:
-            for ee, nn in zip(self.station_east, self.station_north):
-                self.ax1.text(ee / self.dscale, nn / self.dscale,
-                              '*',
-                              verticalalignment='center',
-                              horizontalalignment='center',
-                              fontdict={'size': self.font_size - 2,
-                                        'weight': 'bold'})
-
-        # set axis properties
-        if self.xlimits is not None:
-            self.ax1.set_xlim(self.xlimits)
-        else:
-            self.ax1.set_xlim(current_xlimits)
-
-        if self.ylimits is not None:
-            self.ax1.set_ylim(self.ylimits)
-        else:
-            self.ax1.set_ylim(current_ylimits)
+        plot_res = self._log_res[self.depth_index]
+        self.mesh_plot.set_array(plot_res.ravel())
 
-        self.ax1.set_ylabel('Northing (' + self.map_scale + ')',
-                            fontdict=self.fdict)
-        self.ax1.set_xlabel('Easting (' + self.map_scale + ')',
-                            fontdict=self.fdict)
+        depth_title = self._grid_z_s[self.depth_index]
+        title = 'Depth = {:.3f} '.format(depth_title) + \
+                '(' + self.map_scale + ')'
 
-        depth_title = self.grid_z[self.depth_index] / self.dscale
+        # a new depth changes the title so the whole canvas is redrawn
+        if self._bg is None or title != self.ax1.get_title():
+            self.ax1.set_title(title, fontdict=self.fdict)
+            self.fig.canvas.draw_idle()
+            return
 
-        self.ax1.set_title('Depth = {:.3f} '.format(depth_title) + \
-                           '(' + self.map_scale + ')',
-                           fontdict=self.fdict)
+        # only the colors changed, blit the mesh and what lies on top of it
+        self.fig.canvas.restore_region(self._bg)
+        self.ax1.draw_artist(self.mesh_plot)
+        self.ax1.draw_artist(self.grid_lines)
+        if self._sta_scatter is not None:
+            self.ax1.draw_artist(self._sta_scatter)
+        self.fig.canvas.blit(self.ax1.bbox)
 
-        # plot finite element mesh
-        self.ax1.plot(self.east_line_xlist,
-                      self.east_line_ylist,
-                      lw=.25,
-                      color='k')
+        # keep the stored backgrounds in step with the edited colors
+        self._bg = self.fig.canvas.copy_from_bbox(self.ax1.bbox)
+        self.rect_selector.update_background(None)
 
-        self.ax1.plot(self.north_line_xlist,
-                      self.north_line_ylist,
-                      lw=.25,
-                      color='k')
+    def _update_stations(self):
+        """
+        move the existing station markers to the current station locations
+        """
+        self._sta_scatter.set_offsets(np.column_stack((self._sta_e,
+                                                       self._sta_n)))
 
-        # be sure to redraw the canvas
-        self.fig.canvas.draw()
+    def _on_draw_callback(self, event):
+        """
+        store the map axes after a full draw
+        """
+        self._bg = self.fig.canvas.copy_from_bbox(self.ax1.bbox)
 
     #    def set_res_value(self, label):
     #        self.res_value = float(label)
-    #        print 'set resistivity to ', label
-    #        print self.res_value
+    #        print('set resistivity to ', label)
+    #        print(self.res_value)
     def set_res_value(self, val):
         self.res_value = 10 ** val
-        print 'set resistivity to ', self.res_value
+        print('set resistivity to ', self.res_value)
 
     def _on_key_callback(self, event):
         """
@@ -473,27 +482,20 @@ class ModelManipulator(Model):
 
         self.event_change_depth = event
 
-        # go down a layer on push of +/= keys
-        if self.event_change_depth.key == '=':
-            self.depth_index += 1
-
-            if self.depth_index > len(self.grid_z) - 1:
-                self.depth_index = len(self.grid_z) - 1
-                print 'already at deepest depth'
-
-            print 'Plotting Depth {0:.3f}'.format(self.grid_z[self.depth_index] / \
-                                                  self.dscale) + '(' + self.map_scale + ')'
-
-            self.redraw_plot()
-        # go up a layer on push of - key
-        elif self.event_change_depth.key == '-':
-            self.depth_index -= 1
-
-            if self.depth_index < 0:
-                self.depth_index = 0
-
-            print 'Plotting Depth {0:.3f} '.format(self.grid_z[self.depth_index] / \
-                                                   self.dscale) + '(' + self.map_scale + ')'
+        # go down a layer on push of +/= keys or up a layer on push of -,
+        # nothing is redrawn when already at the deepest or top layer
+        if self.event_change_depth.key in ('=', '-'):
+            step = 1 if self.event_change_depth.key == '=' else -1
+            depth_index = int(np.clip(self.depth_index + step, 0,
+                                      self.res_model.shape[2] - 1))
+            if depth_index == self.depth_index:
+                if step == 1:
+                    print('already at deepest depth')
+                return
+            self.depth_index = depth_index
+
+            print('Plotting Depth {0:.3f} '.format(
+                self._grid_z_s[self.depth_index]) + '(' + self.map_scale + ')')
 
             self.redraw_plot()
 
@@ -505,37 +507,36 @@ class ModelManipulator(Model):
 
         # copy the layer above
         elif self.event_change_depth.key == 'a':
-            try:
-                if self.depth_index == 0:
-                    print 'No layers above'
-                else:
-                    self.res_model[:, :, self.depth_index] = \
-                        self.res_model[:, :, self.depth_index - 1]
-            except IndexError:
-                print 'No layers above'
+            if not 0 < self.depth_index < self.res_model.shape[2]:
+                print('No layers above')
+            else:
+                self.res_model[:, :, self.depth_index] = \
+                    self.res_model[:, :, self.depth_index - 1]
+                self._log_res[self.depth_index] = \
+                    self._log_res[self.depth_index - 1]
 
             self.redraw_plot()
 
         # copy the layer below
         elif self.event_change_depth.key == 'b':
-            try:
+            if self.depth_index + 1 >= self.res_model.shape[2]:
+                print('No more layers below')
+            else:
                 self.res_model[:, :, self.depth_index] = \
                     self.res_model[:, :, self.depth_index + 1]
-            except IndexError:
-                print 'No more layers below'
+                self._log_res[self.depth_index] = \
+                    self._log_res[self.depth_index + 1]
 
             self.redraw_plot()
 
             # undo
         elif self.event_change_depth.key == 'u':
-            if type(self.xchange) is int and type(self.ychange) is int:
-                self.res_model[self.ychange, self.xchange, self.depth_index] = \
-                    self.res_copy[self.ychange, self.xchange, self.depth_index]
-            else:
-                for xx in self.xchange:
-                    for yy in self.ychange:
-                        self.res_model[yy, xx, self.depth_index] = \
-                            self.res_copy[yy, xx, self.depth_index]
+            change_index = np.ix_(np.atleast_1d(self.ychange),
+                                  np.atleast_1d(self.xchange))
+            self.res_model[:, :, self.depth_index][change_index] = \
+                self.res_copy[:, :, self.depth_index][change_index]
+            self._log_res[self.depth_index][change_index] = \
+                np.log10(self.res_copy[:, :, self.depth_index][change_index])
 
             self.redraw_plot()
 
@@ -544,12 +545,12 @@ class ModelManipulator(Model):
         change resistivity values of resistivity model
 
         """
-        if type(xchange) is int and type(ychange) is int:
-            self.res_model[ychange, xchange, self.depth_index] = self.res_value
-        else:
-            for xx in xchange:
-                for yy in ychange:
-                    self.res_model[yy, xx, self.depth_index] = self.res_value
+        # index the whole rectangle at once, a single cell is just a 1 x 1
+        # rectangle
+        change_index = np.ix_(np.atleast_1d(ychange), np.atleast_1d(xchange))
+        self.res_model[:, :, self.depth_index][change_index] = self.res_value
+        self._log_res[self.depth_index][change_index] = \
+            np.log10(self.res_value)
 
         self.redraw_plot()
 
@@ -570,24 +571,19 @@ class ModelManipulator(Model):
         """
         get the index value of the points to be changed
 
+        the grid is sorted so the nodes inside the selection are found with
+        a binary search, the cell left of the first node is included as well
+
         """
-        if x1 < x2:
-            xchange = np.where((self.grid_east / self.dscale >= x1) & \
-                               (self.grid_east / self.dscale <= x2))[0]
-            if len(xchange) == 0:
-                xchange = np.where(self.grid_east / self.dscale >= x1)[0][0] - 1
-                return [xchange]
-
-        if x1 > x2:
-            xchange = np.where((self.grid_east / self.dscale <= x1) & \
-                               (self.grid_east / self.dscale >= x2))[0]
-            if len(xchange) == 0:
-                xchange = np.where(self.grid_east / self.dscale >= x2)[0][0] - 1
-                return [xchange]
-
-        # check the edges to see if the selection should include the square
-        xchange = np.append(xchange, xchange[0] - 1)
-        xchange.sort()
+        x_lo, x_hi = sorted((x1, x2))
+        i0 = np.searchsorted(self._ge_s, x_lo, side='left')
+        i1 = np.searchsorted(self._ge_s, x_hi, side='right')
+
+        # selection is inside a single cell
+        if i1 == i0:
+            return [max(i0 - 1, 0)]
+
+        xchange = np.arange(max(i0 - 1, 0), i1)
 
         return xchange
 
@@ -598,23 +594,16 @@ class ModelManipulator(Model):
         need to flip the index because the plot is flipped
 
         """
+        y_lo, y_hi = sorted((y1, y2))
+        i0 = np.searchsorted(self._gn_s, y_lo, side='right')
+        i1 = np.searchsorted(self._gn_s, y_hi, side='left')
+
+        # selection is inside a single cell
+        if i1 <= i0:
+            return [max(np.searchsorted(self._gn_s, y_lo, side='left') - 1,
+                        0)]
 
-        if y1 < y2:
-            ychange = np.where((self.grid_north / self.dscale > y1) & \
-                               (self.grid_north / self.dscale < y2))[0]
-            if len(ychange) == 0:
-                ychange = np.where(self.grid_north / self.dscale >= y1)[0][0] - 1
-                return [ychange]
-
-        elif y1 > y2:
-            ychange = np.where((self.grid_north / self.dscale < y1) & \
-                               (self.grid_north / self.dscale > y2))[0]
-            if len(ychange) == 0:
-                ychange = np.where(self.grid_north / self.dscale >= y2)[0][0] - 1
-                return [ychange]
-
-        ychange -= 1
-        ychange = np.append(ychange, ychange[-1] + 1)
+        ychange = np.arange(max(i0 - 1, 0), i1)
 
         return ychange
 
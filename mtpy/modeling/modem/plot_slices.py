@@ -13,16 +13,52 @@ import os
 
 import numpy as np
 from matplotlib import pyplot as plt, gridspec as gridspec, colorbar as mcb
+from matplotlib.backend_bases import TimerBase
+from matplotlib.collections import LineCollection
 from matplotlib.colors import Normalize
+from matplotlib.image import AxesImage
 from matplotlib.widgets import Button, RadioButtons, SpanSelector
 
 from mtpy.modeling.modem.data import Data
 from mtpy.modeling.modem.data import Model
 from mtpy.utils import exceptions as mtex
+from mtpy.utils.numba_utils import compile_kernel, prange
 from scipy.spatial import cKDTree
 from scipy.interpolate import interp1d, UnivariateSpline
 from matplotlib import colors
 
+
+def _bin_stations(grid, location, value, index, counts, offsets, out):
+    """
+    bin value of each station by the grid line at or below its location.
+
+    index, counts and offsets are work arrays of size location.size,
+    grid.size and grid.size + 1.  On return the values of grid line ii are
+    out[offsets[ii]:offsets[ii + 1]] in their original station order.
+    Stations outside of the grid are left out.
+    """
+    for ii in prange(location.size):
+        index[ii] = np.searchsorted(grid, location[ii], side='right') - 1
+
+    # count the stations of each grid line, then scatter them in order
+    for ii in range(location.size):
+        if 0 <= index[ii] < grid.size:
+            counts[index[ii]] += 1
+    offsets[0] = 0
+    for jj in range(grid.size):
+        offsets[jj + 1] = offsets[jj] + counts[jj]
+    for ii in range(location.size):
+        jj = index[ii]
+        if 0 <= jj < grid.size:
+            out[offsets[jj + 1] - counts[jj]] = value[ii]
+            counts[jj] -= 1
+
+
+_bin_stations_kernel = compile_kernel(_bin_stations)
+# loading the compiled kernel takes ~0.1 s, below this many stations the
+# numpy grouping is faster
+_BIN_STATIONS_KERNEL_MIN = 500000
+
 __all__ = ['PlotSlices']
 
 
@@ -64,8 +100,6 @@ class PlotSlices(object):
     #    data_fn                 full path to data file name
     #    draw_colorbar           show colorbar on exported plot; default True
     #    dscale                  scaling parameter depending on map_scale
-    #    east_line_xlist         list of line nodes of east grid for faster plotting
-    #    east_line_ylist         list of line nodes of east grid for faster plotting
     #    ew_limits               (min, max) limits of e-w in map_scale units
     #                            *default* is None and scales to station area
     #    fig                     matplotlib.figure instance for figure
@@ -80,6 +114,8 @@ class PlotSlices(object):
     #                            font_size+2. *default* is 4
     #    grid_east               relative location of grid nodes in e-w direction
     #                            in map_scale units
+    #    grid_lines              matplotlib.collections.LineCollection of the
+    #                            model grid in map view
     #    grid_north              relative location of grid nodes in n-s direction
     #                            in map_scale units
     #    grid_z                  relative location of grid nodes in z direction
@@ -90,14 +126,6 @@ class PlotSlices(object):
     #    initial_fn              full path to initial file
     #    key_press               matplotlib.canvas.connect instance
     #    map_scale               [ 'm' | 'km' ] scale of map. *default* is km
-    #    mesh_east               np.meshgrid(grid_east, grid_north)[0]
-    #    mesh_en_east            np.meshgrid(grid_east, grid_north)[0]
-    #    mesh_en_north           np.meshgrid(grid_east, grid_north)[1]
-    #    mesh_ez_east            np.meshgrid(grid_east, grid_z)[0]
-    #    mesh_ez_vertical        np.meshgrid(grid_east, grid_z)[1]
-    #    mesh_north              np.meshgrid(grid_east, grid_north)[1]
-    #    mesh_nz_north           np.meshgrid(grid_north, grid_z)[0]
-    #    mesh_nz_vertical        np.meshgrid(grid_north, grid_z)[1]
     #    model_fn                full path to model file
     #    ms                      size of station markers in points. *default* is 2
     #    nodes_east              relative distance betwen nodes in e-w direction
@@ -106,8 +134,6 @@ class PlotSlices(object):
     #                            in map_scale units
     #    nodes_z                 relative distance betwen nodes in z direction
     #                            in map_scale units
-    #    north_line_xlist        list of line nodes north grid for faster plotting
-    #    north_line_ylist        list of line nodes north grid for faster plotting
     #    ns_limits               (min, max) limits of plots in n-s direction
     #                            *default* is None, set veiwing area to station area
     #    plot_yn                 [ 'y' | 'n' ] 'y' to plot on instantiation
@@ -149,6 +175,8 @@ class PlotSlices(object):
     def __init__(self, model_fn, data_fn=None, **kwargs):
         self.model_fn = model_fn
         self.data_fn = data_fn
+        # files and modification times of the last read, see read_files
+        self._loaded_sig = None
 
         self.fig_num = kwargs.pop('fig_num', 1)
         self.fig_size = kwargs.pop('fig_size', [6, 6])
@@ -190,9 +218,6 @@ class PlotSlices(object):
         self.nodes_north = None
         self.nodes_z = None
 
-        self.mesh_east = None
-        self.mesh_north = None
-
         self.station_east = None
         self.station_north = None
         self.station_names = None
@@ -217,6 +242,22 @@ class PlotSlices(object):
         self.save_path = kwargs.pop('save_path', os.getcwd())
         self.save_format = kwargs.pop('save_format', 'png')
 
+        # slice keys: (index attribute, res_model axis of the index, step,
+        #              message at the model edge, slices to update)
+        self._key_handlers = {
+            'n': ('index_north', 0, 1, 'Already at northern most grid cell',
+                  ('ez', 'map')),
+            'm': ('index_north', 0, -1, 'Already at southern most grid cell',
+                  ('ez', 'map')),
+            'e': ('index_east', 1, 1, 'Already at eastern most grid cell',
+                  ('nz', 'map')),
+            'w': ('index_east', 1, -1, 'Already at western most grid cell',
+                  ('nz', 'map')),
+            'd': ('index_vertical', 2, 1, 'Already at deepest grid cell',
+                  ('en', 'nz', 'map')),
+            'u': ('index_vertical', 2, -1, 'Already at surface grid cell',
+                  ('en', 'nz', 'map'))}
+
         # read data
         self.read_files()
         self.get_station_grid_locations()
@@ -449,14 +490,29 @@ class PlotSlices(object):
 
     def read_files(self):
         """
-        read in the files to get appropriate information
+        read in the files to get appropriate information, files that have
+        not changed since the last read are not read again
         """
+        sig = tuple((fn, os.path.isfile(fn) and os.path.getmtime(fn))
+                    for fn in (self.model_fn, self.data_fn)
+                    if fn is not None) + (self.dscale,)
+        if sig == self._loaded_sig:
+            return
+
         # --> read in model file
         if self.model_fn is not None:
             if os.path.isfile(self.model_fn) == True:
                 md_model = Model()
                 md_model.read_model_file(self.model_fn)
                 self.res_model = md_model.res_model
+                # slices are plotted in log scale, take the log only once;
+                # float32 is plenty for colour mapping and halves the
+                # memory traffic of every slice copy
+                self._log_res = np.log10(self.res_model).astype(np.float32)
+                # depth slices are read from a (z, north, east) copy where
+                # each slice is contiguous
+                self._log_res_dfirst = np.ascontiguousarray(
+                    self._log_res.transpose(2, 0, 1))
                 self.grid_east = md_model.grid_east / self.dscale
                 self.grid_north = md_model.grid_north / self.dscale
                 self.grid_z = md_model.grid_z / self.dscale
@@ -483,6 +539,8 @@ class PlotSlices(object):
             else:
                 print 'Could not find data file {0}'.format(self.data_fn)
 
+        self._loaded_sig = sig
+
     def plot(self):
         """
         plot:
@@ -535,6 +593,7 @@ class PlotSlices(object):
         self.fig = plt.figure(self.fig_num, figsize=self.fig_size,
                               dpi=self.fig_dpi,frameon=False)
         plt.clf()
+        self._blit_ready = False
 
         # annotations
         self.ax_border = plt.axes([0.01, 0.01, 0.98, 0.3])
@@ -566,18 +625,34 @@ class PlotSlices(object):
         axList = [self.ax_ez, self.ax_nz, self.ax_en, self.ax_map]
         for ax in axList: ax.tick_params(axis='both', length=2)
 
-        # make grid meshes being sure the indexing is correct
-        self.mesh_ez_east, self.mesh_ez_vertical = np.meshgrid(self.grid_east,
-                                                               self.grid_z,
-                                                               indexing='ij')
-        self.mesh_nz_north, self.mesh_nz_vertical = np.meshgrid(self.grid_north,
-                                                                self.grid_z,
-                                                                indexing='ij')
-        self.mesh_en_east, self.mesh_en_north = np.meshgrid(self.grid_east,
-                                                            self.grid_north,
-                                                            indexing='ij')
-
-        # --> plot east vs vertical
+        # --> plot east vs vertical, the meshes are made on the first update
+        # and only get new values on later updates
+        self._qm_ez = None
+        self._qm_nz = None
+        self._qm_en = None
+
+        # station markers are made once, hidden until a slice shows them,
+        # the vertical slices move a pool as large as the fullest grid line
+        self._ez_station_texts = self._make_station_pool(
+            self.ax_ez, self.station_dict_north)
+        self._nz_station_texts = self._make_station_pool(
+            self.ax_nz, self.station_dict_east)
+        self._en_station_texts = []
+        if self.station_east is not None and self.plot_stations:
+            for ee, nn, elev, name in zip(self.station_east,
+                                          self.station_north,
+                                          self.station_elev,
+                                          self.station_names):
+                for label in ('+', name[2:]):
+                    self._en_station_texts.append(
+                        (elev,
+                         self.ax_en.text(ee, nn, label,
+                                         verticalalignment='center',
+                                         horizontalalignment='center',
+                                         fontdict={'size': 1,
+                                                   'weight': 'bold',
+                                                   'color': (.75, 0, 0)},
+                                         visible=False)))
         self._update_ax_ez()
 
         # --> plot north vs vertical
@@ -586,7 +661,66 @@ class PlotSlices(object):
         # --> plot east vs north
         self._update_ax_en()
 
-        # --> plot the grid as a map view
+        # indices the slices were last drawn at
+        self._last_indices = (self.index_north, self.index_east,
+                              self.index_vertical)
+
+        # --> plot the grid as a map view, the grid lines are built once as
+        # (n_lines, 2, 2) segment arrays drawn by a single LineCollection
+        east_segs = np.empty((self.grid_east.size, 2, 2))
+        east_segs[:, :, 0] = self.grid_east[:, np.newaxis]
+        east_segs[:, 0, 1] = self.grid_north.min()
+        east_segs[:, 1, 1] = self.grid_north.max()
+
+        north_segs = np.empty((self.grid_north.size, 2, 2))
+        north_segs[:, 0, 0] = self.grid_east.min()
+        north_segs[:, 1, 0] = self.grid_east.max()
+        north_segs[:, :, 1] = self.grid_north[:, np.newaxis]
+
+        self.grid_lines = LineCollection(np.concatenate((east_segs, north_segs)),
+                                         linewidths=.25,
+                                         colors='k')
+        self.ax_map.add_collection(self.grid_lines)
+
+        # --> plot the stations
+        self._map_station_texts = []
+        if self.station_east is not None:
+            self._map_station_texts = \
+                [self.ax_map.text(ee, nn, '*',
+                                  verticalalignment='center',
+                                  horizontalalignment='center',
+                                  fontdict={'size': 5, 'weight': 'bold'})
+                 for ee, nn in zip(self.station_east, self.station_north)]
+
+        self.ax_map.set_xlim(self.ew_limits)
+        self.ax_map.set_ylim(self.ns_limits)
+        self.ax_map.set_ylabel('Northing ({0})'.format(self.map_scale),
+                               fontdict=self.font_dict)
+        self.ax_map.set_xlabel('Easting ({0})'.format(self.map_scale),
+                               fontdict=self.font_dict)
+
+        # --> slice indication lines, _update_map only moves them
+        self._ge_min = float(self.grid_east.min())
+        self._ge_max = float(self.grid_east.max())
+        self._gn_min = float(self.grid_north.min())
+        self._gn_max = float(self.grid_north.max())
+        self._ew_indicator, = self.ax_map.plot([self._ge_min, self._ge_max],
+                                               [0, 0],
+                                               lw=1,
+                                               color='g')
+        self._ns_indicator, = self.ax_map.plot([0, 0],
+                                               [self._gn_min, self._gn_max],
+                                               lw=1,
+                                               color='b')
+
+        # --> depth of the map view slice, _update_map only sets its text
+        self._depth_label = self.ax_map.text(self.ew_limits[0] * .95,
+                                             self.ns_limits[1] * .95,
+                                             '',
+                                             horizontalalignment='left',
+                                             verticalalignment='top',
+                                             bbox={'facecolor': 'white'},
+                                             fontdict=self.font_dict)
         self._update_map()
 
         # plot color bar
@@ -616,6 +750,21 @@ class PlotSlices(object):
         self.key_press = self.fig.canvas.mpl_connect('key_press_event',
                                                      self.on_key_press)
 
+        # key presses are drawn from a timer, canvases without an event loop
+        # have timers that never fire so those draw straight away
+        self._pending = set()
+        self._timer_started = False
+        self._timer = self.fig.canvas.new_timer(interval=16)
+        if type(self._timer) is TimerBase:
+            self._timer = None
+        else:
+            self._timer.single_shot = True
+            self._timer.add_callback(self._draw_pending)
+
+        # after a full draw single axes can be redrawn and blitted
+        self.cid_draw = self.fig.canvas.mpl_connect('draw_event',
+                                                    self._on_draw)
+
         # Interactive widgets ==========================================
         def getCursorValue():
             if(self.current_label == 'N-E'):
@@ -648,9 +797,10 @@ class PlotSlices(object):
                                   self.current_range[0] * np.ones(len(self.current_range)),
                                   self.current_range[1] * np.ones(len(self.current_range)),
                                   alpha=0.5, facecolor='b')
-        self.ax_span.plot(np.ones(2)*getCursorValue(),
-                          np.array(self.current_range),
-                          c=self.axis_cursor_colors[self.current_label], lw=1)
+        self._span_cursor, = self.ax_span.plot(
+            np.ones(2)*getCursorValue(),
+            np.array(self.current_range),
+            c=self.axis_cursor_colors[self.current_label], lw=1)
 
         self.ax_span.set_xlim(self.current_range)
         self.ax_span.set_ylim(self.current_range)
@@ -678,9 +828,10 @@ class PlotSlices(object):
                                       self.current_range[0] * np.ones(len(self.current_range)),
                                       self.current_range[1] * np.ones(len(self.current_range)),
                                       alpha=0.5, facecolor='b')
-            self.ax_span.plot(np.ones(2) * getCursorValue(),
-                              np.array(self.current_range),
-                              c=self.axis_cursor_colors[self.current_label], lw=1)
+            self._span_cursor, = self.ax_span.plot(
+                np.ones(2) * getCursorValue(),
+                np.array(self.current_range),
+                c=self.axis_cursor_colors[self.current_label], lw=1)
 
             self.ax_span.set_yticks([])
             self.ax_span.set_title('%s Extent: Click+Drag to Select Sub-range'%
@@ -728,13 +879,14 @@ class PlotSlices(object):
 
         radio.on_clicked(updateRange)
 
-        span = SpanSelector(self.ax_span, onSelect, 'horizontal', useblit=True,
+        span = self._span_selector = SpanSelector(self.ax_span, onSelect, 'horizontal', useblit=True,
                     rectprops=dict(alpha=0.5, facecolor='red', edgecolor='none'))
 
         button = Button(self.ax_button, 'Export', color='lightgoldenrodyellow',
                         hovercolor='orange')
         button.on_clicked(buttonClicked)
         self.update_range_func = updateRange
+        self._get_cursor_value = getCursorValue
 
         # Only show interactive popout if plot_yn is set to True; otherwise hide
         # popout
@@ -770,14 +922,14 @@ class PlotSlices(object):
                        2: '$10^{2}$', 3: '$10^{3}$', 4: '$10^{4}$', 5: '$10^{5}$',
                        6: '$10^{6}$', 7: '$10^{7}$', 8: '$10^{8}$'}
 
-        # make a mesh grid of nodes
-        xg, yg = None, None
+        # cell edges along the x and y axes of the slices, pcolormesh
+        # takes these directly without making a mesh grid
         if(plane == 'N-E'):
-            xg, yg = self.mesh_en_east, self.mesh_en_north
+            x_nodes, y_nodes = self.grid_east, self.grid_north
         elif(plane == 'N-Z'):
-            xg, yg = self.mesh_nz_north, self.mesh_nz_vertical
+            x_nodes, y_nodes = self.grid_north, self.grid_z
         elif(plane == 'E-Z'):
-            xg, yg = self.mesh_ez_east, self.mesh_ez_vertical
+            x_nodes, y_nodes = self.grid_east, self.grid_z
 
         plt.rcParams['font.size'] = self.font_size
 
@@ -794,20 +946,20 @@ class PlotSlices(object):
             ax1.tick_params(axis='both', length=2)
 
             if (plane == 'N-E'):
-                plot_res = np.log10(self.res_model[:, :, ii].T)
+                plot_res = self._log_res_dfirst[ii]
                 ax1.set_xlim(self.ew_limits)
                 ax1.set_ylim(self.ns_limits)
                 ax1.set_ylabel('Northing (' + self.map_scale + ')', fontdict=fdict)
                 ax1.set_xlabel('Easting (' + self.map_scale + ')', fontdict=fdict)
             elif (plane == 'N-Z'):
-                plot_res = np.log10(self.res_model[:, ii, :])
+                plot_res = self._log_res[:, ii, :].T
                 ax1.set_xlim(self.ns_limits)
                 ax1.set_ylim(self.z_limits)
                 ax1.invert_yaxis()
                 ax1.set_ylabel('Depth (' + self.map_scale + ')', fontdict=fdict)
                 ax1.set_xlabel('Northing (' + self.map_scale + ')', fontdict=fdict)
             elif (plane == 'E-Z'):
-                plot_res = np.log10(self.res_model[ii, :, :])
+                plot_res = self._log_res[ii, :, :].T
                 ax1.set_xlim(self.ew_limits)
                 ax1.set_ylim(self.z_limits)
                 ax1.invert_yaxis()
@@ -815,12 +967,7 @@ class PlotSlices(object):
                 ax1.set_xlabel('Easting (' + self.map_scale + ')', fontdict=fdict)
             # end if
 
-            mesh_plot = ax1.pcolormesh(xg,
-                                       yg,
-                                       plot_res,
-                                       cmap=self.cmap,
-                                       vmin=self.climits[0],
-                                       vmax=self.climits[1])
+            mesh_plot = self._plot_slice(ax1, x_nodes, y_nodes, plot_res)
             # plot the stations
             if (self.station_east is not None \
                     and self.plot_stations):
@@ -869,11 +1016,11 @@ class PlotSlices(object):
             if self.plot_grid == 'y':
                 x_line_xlist = []
                 x_line_ylist = []
-                for xx in xg[:,0]:
+                for xx in x_nodes:
                     x_line_xlist.extend([xx, xx])
                     x_line_xlist.append(None)
-                    x_line_ylist.extend([yg[0,:].min(),
-                                         yg[0,:].max()])
+                    x_line_ylist.extend([y_nodes.min(),
+                                         y_nodes.max()])
                     x_line_ylist.append(None)
                 ax1.plot(x_line_xlist,
                          x_line_ylist,
@@ -882,9 +1029,9 @@ class PlotSlices(object):
 
                 y_line_xlist = []
                 y_line_ylist = []
-                for yy in yg[0,:]:
-                    y_line_xlist.extend([xg[:,0].min(),
-                                         xg[:,0].max()])
+                for yy in y_nodes:
+                    y_line_xlist.extend([x_nodes.min(),
+                                         x_nodes.max()])
                     y_line_xlist.append(None)
                     y_line_ylist.extend([yy, yy])
                     y_line_ylist.append(None)
@@ -955,270 +1102,311 @@ class PlotSlices(object):
 
         """
 
-        key_press = event.key
+        handler = self._key_handlers.get(event.key)
+        if handler is None:
+            return
+        index_name, axis, step, edge_message, pending = handler
+
+        # indices address model cells, the grids hold the cell edges
+        old_index = getattr(self, index_name)
+        new_index = min(max(old_index + step, 0),
+                        self.res_model.shape[axis] - 1)
+        # nothing to redraw at the model edges
+        if new_index == old_index:
+            print edge_message
+            return
+        setattr(self, index_name, new_index)
+
+        # the depth is only printed when it changes, held keys at the
+        # model edge would flood the console otherwise
+        if index_name == 'index_vertical':
+            print 'Depth = {0:.5g} ({1})'.format(self.grid_z[self.index_vertical],
+                                                 self.map_scale)
 
-        if key_press == 'n':
-            if self.index_north == self.grid_north.size:
-                print 'Already at northern most grid cell'
-            else:
-                self.index_north += 1
-                if self.index_north > self.grid_north.size:
-                    self.index_north = self.grid_north.size
-            self._update_ax_ez()
-            self._update_map()
+        self._pending.update(pending)
+        self._pending.add('span')
 
-        if key_press == 'm':
-            if self.index_north == 0:
-                print 'Already at southern most grid cell'
-            else:
-                self.index_north -= 1
-                if self.index_north < 0:
-                    self.index_north = 0
-            self._update_ax_ez()
-            self._update_map()
+        # held keys repeat faster than the canvas can draw, so the updates
+        # are collected and drawn once by a short single shot timer
+        if self._timer is None:
+            self._draw_pending()
+        elif not self._timer_started:
+            self._timer_started = True
+            self._timer.start()
+    # end func
 
-        if key_press == 'e':
-            if self.index_east == self.grid_east.size:
-                print 'Already at eastern most grid cell'
-            else:
-                self.index_east += 1
-                if self.index_east > self.grid_east.size:
-                    self.index_east = self.grid_east.size
-            self._update_ax_nz()
-            self._update_map()
+    def _draw_pending(self):
+        """
+        update the axes whose slices changed since the last update
+        """
+        pending = self._pending
+        self._pending = set()
+        self._timer_started = False
+
+        last_north, last_east, last_vertical = self._last_indices
+        self._last_indices = (self.index_north, self.index_east,
+                              self.index_vertical)
+        # key presses that cancel out before the timer fires change nothing
+        if self._last_indices == (last_north, last_east, last_vertical):
+            return
 
-        if key_press == 'w':
-            if self.index_east == 0:
-                print 'Already at western most grid cell'
-            else:
-                self.index_east -= 1
-                if self.index_east < 0:
-                    self.index_east = 0
-            self._update_ax_nz()
+        if 'ez' in pending and self.index_north != last_north:
+            self._update_ax_ez()
+        if 'nz' in pending:
+            self._update_ax_nz(update_slice=self.index_east != last_east)
+        if 'en' in pending and self.index_vertical != last_vertical:
+            self._update_ax_en()
+        if 'map' in pending:
             self._update_map()
 
-        if key_press == 'd':
-            if self.index_vertical == self.grid_z.size:
-                print 'Already at deepest grid cell'
+        # a selection is cleared when the slices move, otherwise only the
+        # cursor of the span selector moves
+        if 'span' in pending:
+            if len(self.selected_indices) > 0:
+                self.update_range_func(self.current_label)
             else:
-                self.index_vertical += 1
-                if self.index_vertical > self.grid_z.size:
-                    self.index_vertical = self.grid_z.size
-            self._update_ax_en()
-            self._update_ax_nz()
-            print 'Depth = {0:.5g} ({1})'.format(self.grid_z[self.index_vertical],
-                                                 self.map_scale)
+                self._span_cursor.set_xdata(np.ones(2) *
+                                            self._get_cursor_value())
+                self._refresh_axes(self.ax_span)
+                if self._blit_ready:
+                    self._span_selector.update_background(None)
 
-        if key_press == 'u':
-            if self.index_vertical == 0:
-                print 'Already at surface grid cell'
-            else:
-                self.index_vertical -= 1
-                if self.index_vertical < 0:
-                    self.index_vertical = 0
-            self._update_ax_en()
-            self._update_ax_nz()
-            print 'Depth = {0:.5gf} ({1})'.format(self.grid_z[self.index_vertical],
-                                                  self.map_scale)
-        self.update_range_func(self.current_label)
-    # end func
+    def _plot_slice(self, ax, x_grid, y_grid, plot_res):
+        """
+        plot a (y, x) slice of the model on ax.  Slices on regular grids are
+        drawn as an image, which renders much faster than a mesh of
+        quadrilaterals, others with pcolormesh.
+        """
+        if self._is_uniform(x_grid) and self._is_uniform(y_grid):
+            return ax.imshow(plot_res,
+                             origin='lower',
+                             extent=(x_grid[0], x_grid[-1],
+                                     y_grid[0], y_grid[-1]),
+                             aspect=ax.get_aspect(),
+                             interpolation='nearest',
+                             cmap=self.cmap,
+                             vmin=self.climits[0],
+                             vmax=self.climits[1])
+
+        return ax.pcolormesh(x_grid,
+                             y_grid,
+                             plot_res,
+                             cmap=self.cmap,
+                             vmin=self.climits[0],
+                             vmax=self.climits[1])
+
+    @staticmethod
+    def _set_slice(artist, plot_res):
+        """
+        put new values of a (y, x) slice into an artist from _plot_slice
+        """
+        if isinstance(artist, AxesImage):
+            artist.set_data(plot_res)
+        else:
+            artist.set_array(plot_res.ravel())
+
+    @staticmethod
+    def _is_uniform(grid):
+        """
+        True if all cells of the grid have the same width
+        """
+        cells = np.diff(grid)
+        return np.allclose(cells, cells[0])
 
     def _update_ax_ez(self):
         """
         update east vs vertical plot
         """
-        self.ax_ez.cla()
-        plot_ez = np.log10(self.res_model[self.index_north, :, :])
-        self.ax_ez.pcolormesh(self.mesh_ez_east,
-                              self.mesh_ez_vertical,
-                              plot_ez,
-                              cmap=self.cmap,
-                              vmin=self.climits[0],
-                              vmax=self.climits[1])
+        plot_ez = self._log_res[self.index_north, :, :].T
+        if self._qm_ez is None:
+            self._qm_ez = self._plot_slice(self.ax_ez,
+                                           self.grid_east, self.grid_z, plot_ez)
+            self.ax_ez.set_xlim(self.ew_limits)
+            self.ax_ez.set_ylim(self.z_limits[1], self.z_limits[0])
+            self.ax_ez.set_ylabel('Depth ({0})'.format(self.map_scale),
+                                  fontdict=self.font_dict)
+            self.ax_ez.set_xlabel('Easting ({0})'.format(self.map_scale),
+                                  fontdict=self.font_dict)
+        else:
+            self._set_slice(self._qm_ez, plot_ez)
+
         # plot stations
-        for sx in self.station_dict_north[self.grid_north[self.index_north]]:
-            self.ax_ez.text(sx,
-                            0,
-                            self.station_marker,
-                            horizontalalignment='center',
-                            verticalalignment='baseline',
-                            fontdict={'size': self.ms,
-                                      'color': self.station_color})
-
-        self.ax_ez.set_xlim(self.ew_limits)
-        self.ax_ez.set_ylim(self.z_limits[1], self.z_limits[0])
-        self.ax_ez.set_ylabel('Depth ({0})'.format(self.map_scale),
-                              fontdict=self.font_dict)
-        self.ax_ez.set_xlabel('Easting ({0})'.format(self.map_scale),
-                              fontdict=self.font_dict)
-        self.fig.canvas.draw()
-        self._update_map()
+        self._set_station_pool(
+            self._ez_station_texts,
+            self.station_dict_north[self.grid_north[self.index_north]])
+
+        self._refresh_axes(self.ax_ez)
 
-    def _update_ax_nz(self):
+    def _update_ax_nz(self, update_slice=True):
         """
-        update east vs vertical plot
+        update east vs vertical plot, with update_slice=False only the
+        depth indication line is moved
         """
-        self.ax_nz.cla()
-        plot_nz = np.log10(self.res_model[:, self.index_east, :])
-        self.ax_nz.pcolormesh(self.mesh_nz_north,
-                              self.mesh_nz_vertical,
-                              plot_nz,
-                              cmap=self.cmap,
-                              vmin=self.climits[0],
-                              vmax=self.climits[1])
-
-        # --> depth indication line
-        self.ax_nz.plot([self.grid_north.min(),
-                         self.grid_north.max()],
-                        [self.grid_z[self.index_vertical],
-                         self.grid_z[self.index_vertical]],
-                         lw=1,
-                         color='r')
+        if self._qm_nz is None:
+            plot_nz = self._log_res[:, self.index_east, :].T
+            self._qm_nz = self._plot_slice(self.ax_nz,
+                                           self.grid_north, self.grid_z, plot_nz)
+
+            # --> depth indication line
+            self._nz_depth_line, = \
+                self.ax_nz.plot([self.grid_north.min(),
+                                 self.grid_north.max()],
+                                [self.grid_z[self.index_vertical],
+                                 self.grid_z[self.index_vertical]],
+                                lw=1,
+                                color='r')
+
+            self.ax_nz.set_xlim(self.ns_limits)
+            self.ax_nz.set_ylim(self.z_limits[1], self.z_limits[0])
+            self.ax_nz.set_xlabel('Northing ({0})'.format(self.map_scale),
+                                  fontdict=self.font_dict)
+            self.ax_nz.set_ylabel('Depth ({0})'.format(self.map_scale),
+                                  fontdict=self.font_dict)
+        else:
+            if update_slice:
+                self._set_slice(self._qm_nz,
+                                self._log_res[:, self.index_east, :].T)
+            self._nz_depth_line.set_ydata([self.grid_z[self.index_vertical],
+                                           self.grid_z[self.index_vertical]])
 
         # plot stations
-        for sy in self.station_dict_east[self.grid_east[self.index_east]]:
-            self.ax_nz.text(sy,
-                            0,
-                            self.station_marker,
-                            horizontalalignment='center',
-                            verticalalignment='baseline',
-                            fontdict={'size': self.ms,
-                                      'color': self.station_color})
-        self.ax_nz.set_xlim(self.ns_limits)
-        self.ax_nz.set_ylim(self.z_limits[1], self.z_limits[0])
-        self.ax_nz.set_xlabel('Northing ({0})'.format(self.map_scale),
-                              fontdict=self.font_dict)
-        self.ax_nz.set_ylabel('Depth ({0})'.format(self.map_scale),
-                              fontdict=self.font_dict)
-        self.fig.canvas.draw()
-        self._update_map()
+        if update_slice:
+            self._set_station_pool(
+                self._nz_station_texts,
+                self.station_dict_east[self.grid_east[self.index_east]])
+
+        self._refresh_axes(self.ax_nz)
 
     def _update_ax_en(self):
         """
         update east vs vertical plot
         """
+        plot_en = self._log_res_dfirst[self.index_vertical]
+        if self._qm_en is None:
+            self._qm_en = self._plot_slice(self.ax_en,
+                                           self.grid_east, self.grid_north, plot_en)
+            self.ax_en.set_xlim(self.ew_limits)
+            self.ax_en.set_ylim(self.ns_limits)
+            self.ax_en.set_ylabel('Northing ({0})'.format(self.map_scale),
+                                  fontdict=self.font_dict)
+            self.ax_en.set_xlabel('Easting ({0})'.format(self.map_scale),
+                                  fontdict=self.font_dict)
+        else:
+            self._set_slice(self._qm_en, plot_en)
 
-        self.ax_en.cla()
-        plot_en = np.log10(self.res_model[:, :, self.index_vertical].T)
-        self.ax_en.pcolormesh(self.mesh_en_east,
-                              self.mesh_en_north,
-                              plot_en,
-                              cmap=self.cmap,
-                              vmin=self.climits[0],
-                              vmax=self.climits[1])
-        self.ax_en.set_xlim(self.ew_limits)
-        self.ax_en.set_ylim(self.ns_limits)
-        self.ax_en.set_ylabel('Northing ({0})'.format(self.map_scale),
-                              fontdict=self.font_dict)
-        self.ax_en.set_xlabel('Easting ({0})'.format(self.map_scale),
-                              fontdict=self.font_dict)
-        # --> plot the stations
-        if self.station_east is not None and self.plot_stations:
-            for ee, nn, elev, name in zip(self.station_east,
-                                          self.station_north,
-                                          self.station_elev,
-                                          self.station_names):
-                if elev <= self.grid_z[self.index_vertical]:
-                    self.ax_en.text(ee, nn, '+',
-                                    verticalalignment='center',
-                                    horizontalalignment='center',
-                                    fontdict={'size': 1, 'weight': 'bold',
-                                              'color': (.75, 0, 0)})
-                    self.ax_en.text(ee, nn, name[2:],
-                                    verticalalignment='center',
-                                    horizontalalignment='center',
-                                    fontdict={'size': 1, 'weight': 'bold',
-                                              'color': (.75, 0, 0)})
-
-        self.fig.canvas.draw()
-        self._update_map()
+        # --> plot the stations above the depth slice
+        for elev, station_text in self._en_station_texts:
+            station_text.set_visible(elev <= self.grid_z[self.index_vertical])
+
+        self._refresh_axes(self.ax_en)
 
     def _update_map(self):
-        self.ax_map.cla()
-        self.east_line_xlist = []
-        self.east_line_ylist = []
-        for xx in self.grid_east:
-            self.east_line_xlist.extend([xx, xx])
-            self.east_line_xlist.append(None)
-            self.east_line_ylist.extend([self.grid_north.min(),
-                                         self.grid_north.max()])
-            self.east_line_ylist.append(None)
-        self.ax_map.plot(self.east_line_xlist,
-                         self.east_line_ylist,
-                         lw=.25,
-                         color='k')
+        """
+        update the slice indicators and depth label of the map view
+        """
+        # --> e-w and n-s indication lines
+        self._ew_indicator.set_ydata([self.grid_north[self.index_north]] * 2)
+        self._ns_indicator.set_xdata([self.grid_east[self.index_east]] * 2)
 
-        self.north_line_xlist = []
-        self.north_line_ylist = []
-        for yy in self.grid_north:
-            self.north_line_xlist.extend([self.grid_east.min(),
-                                          self.grid_east.max()])
-            self.north_line_xlist.append(None)
-            self.north_line_ylist.extend([yy, yy])
-            self.north_line_ylist.append(None)
-        self.ax_map.plot(self.north_line_xlist,
-                         self.north_line_ylist,
-                         lw=.25,
-                         color='k')
-        # --> e-w indication line
-        self.ax_map.plot([self.grid_east.min(),
-                          self.grid_east.max()],
-                         [self.grid_north[self.index_north],
-                          self.grid_north[self.index_north]],
-                         lw=1,
-                         color='g')
-
-        # --> e-w indication line
-        self.ax_map.plot([self.grid_east[self.index_east],
-                          self.grid_east[self.index_east]],
-                         [self.grid_north.min(),
-                          self.grid_north.max()],
-                         lw=1,
-                         color='b')
-        # --> plot the stations
-        if self.station_east is not None:
-            for ee, nn in zip(self.station_east, self.station_north):
-                self.ax_map.text(ee, nn, '*',
-                                 verticalalignment='center',
-                                 horizontalalignment='center',
-                                 fontdict={'size': 5, 'weight': 'bold'})
+        # --> depth of the map view slice
+        self._depth_label.set_text('{0:.5g} ({1})'.format(
+            self.grid_z[self.index_vertical], self.map_scale))
 
-        self.ax_map.set_xlim(self.ew_limits)
-        self.ax_map.set_ylim(self.ns_limits)
-        self.ax_map.set_ylabel('Northing ({0})'.format(self.map_scale),
-                               fontdict=self.font_dict)
-        self.ax_map.set_xlabel('Easting ({0})'.format(self.map_scale),
-                               fontdict=self.font_dict)
+        self._refresh_axes(self.ax_map)
 
-        # plot stations
-        self.ax_map.text(self.ew_limits[0] * .95, self.ns_limits[1] * .95,
-                         '{0:.5g} ({1})'.format(self.grid_z[self.index_vertical],
-                                                self.map_scale),
-                         horizontalalignment='left',
-                         verticalalignment='top',
-                         bbox={'facecolor': 'white'},
-                         fontdict=self.font_dict)
+    def _refresh_axes(self, ax):
+        """
+        redraw only ax and blit it to the canvas once the canvas has been
+        drawn, otherwise ask for a full redraw
+        """
+        if self._blit_ready and getattr(self.fig.canvas, 'supports_blit', True):
+            ax.draw_artist(ax)
+            self.fig.canvas.blit(ax.bbox)
+        else:
+            self.fig.canvas.draw_idle()
 
-        self.fig.canvas.draw()
+    def _on_draw(self, event):
+        """
+        the canvas has been fully drawn, axes can be blitted from now on
+        """
+        self._blit_ready = True
+
+    def _make_station_pool(self, ax, station_dict):
+        """
+        make hidden station markers on ax, as many as the most stations found
+        on a single grid line of station_dict
+        """
+        n_max = max([len(locations) for locations in station_dict.values()] +
+                    [0])
+        return [ax.text(0,
+                        0,
+                        self.station_marker,
+                        horizontalalignment='center',
+                        verticalalignment='baseline',
+                        fontdict={'size': self.ms,
+                                  'color': self.station_color},
+                        visible=False)
+                for ii in range(n_max)]
+
+    @staticmethod
+    def _set_station_pool(station_texts, locations):
+        """
+        move the first markers of the pool to locations and hide the rest
+        """
+        for ii, station_text in enumerate(station_texts):
+            if ii < len(locations):
+                station_text.set_x(locations[ii])
+                station_text.set_visible(True)
+            else:
+                station_text.set_visible(False)
 
     def get_station_grid_locations(self):
         """
         get the grid line on which a station resides for plotting
 
         """
-        self.station_dict_east = dict([(gx, []) for gx in self.grid_east])
-        self.station_dict_north = dict([(gy, []) for gy in self.grid_north])
-        if self.station_east is not None:
-            for ss, sx in enumerate(self.station_east):
-                gx = np.where(self.grid_east <= sx)[0][-1]
-                self.station_dict_east[self.grid_east[gx]].append(self.station_north[ss])
-
-            for ss, sy in enumerate(self.station_north):
-                gy = np.where(self.grid_north <= sy)[0][-1]
-                self.station_dict_north[self.grid_north[gy]].append(self.station_east[ss])
-        else:
+        if self.station_east is None:
+            self.station_dict_east = dict([(gx, []) for gx in self.grid_east])
+            self.station_dict_north = dict([(gy, []) for gy in self.grid_north])
             return
 
+        self.station_dict_east = self._group_stations(self.grid_east,
+                                                      self.station_east,
+                                                      self.station_north)
+        self.station_dict_north = self._group_stations(self.grid_north,
+                                                       self.station_north,
+                                                       self.station_east)
+
+    @staticmethod
+    def _group_stations(grid, location, value):
+        """
+        group value of each station by the grid line at or below its
+        location, keyed by the grid line value
+        """
+        if _bin_stations_kernel is not None and location.size >= _BIN_STATIONS_KERNEL_MIN:
+            out = np.empty(location.size, dtype=value.dtype)
+            offsets = np.empty(grid.size + 1, dtype=np.int64)
+            _bin_stations_kernel(grid, location, value,
+                                 np.empty(location.size, dtype=np.int64),
+                                 np.zeros(grid.size, dtype=np.int64),
+                                 offsets, out)
+            groups = np.split(out[:offsets[-1]], offsets[1:-1])
+            return dict([(gg, list(group)) for gg, group in zip(grid, groups)])
+
+        # index of the last grid line at or below each station, stations
+        # below the first grid line are left out as in _bin_stations
+        index = np.searchsorted(grid, location, side='right') - 1
+        inside = index >= 0
+        index = index[inside]
+        value = value[inside]
+
+        # stable sort keeps the stations in their original order in a group
+        order = np.argsort(index, kind='mergesort')
+        counts = np.bincount(index, minlength=grid.size)
+        groups = np.split(value[order], np.cumsum(counts)[:-1])
+
+        return dict([(gg, list(group)) for gg, group in zip(grid, groups)])
+
     def redraw_plot(self):
         """
         redraw plot if parameters were changed
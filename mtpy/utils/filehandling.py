@@ -154,6 +154,16 @@ def make_unique_filename(infn):
 
     return outfn
 
+def open_csv_file(fn, mode='w', buffering=-1):
+    """
+    open a file for csv.writer, in binary mode on python 2 and as text
+    without newline translation on python 3, as the csv module expects.
+    mode is 'w' or 'a', buffering as for the builtin open.
+    """
+    if sys.version_info[0] < 3:
+        return open(fn, mode + 'b', buffering)
+    return open(fn, mode, buffering, newline='')
+
 def make_unique_folder(wd,basename = 'run'):
     """
     make a folder that doesn't exist already.
@@ -0,0 +1,25 @@
+"""
+Optional numba support.
+
+numba is not a dependency of mtpy, kernels written with prange fall back to
+plain python loops when it is missing.  Callers keep a numpy code path as
+the default and only use a compiled kernel on inputs large enough to pay
+for it.
+"""
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
+
+
+def compile_kernel(func):
+    """
+    compile func with numba into a parallel kernel, cached on disk so the
+    compilation is only paid once per machine.
+
+    :return: the compiled function, or None if numba is not installed
+    """
+    if njit is None:
+        return None
+    return njit(parallel=True, cache=True)(func)
@@ -18,8 +18,10 @@ from __future__ import print_function
 import csv
 import glob
 import logging
+import multiprocessing
 import os
 import sys
+from functools import partial
 import click
 
 import geopandas as gpd
@@ -28,19 +30,81 @@ import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 from mpl_toolkits.axes_grid1 import make_axes_locatable
-from shapely.geometry import Point, Polygon, LineString, LinearRing
+from shapely.geometry import Polygon, LineString
 
 from mtpy.core.edi_collection import EdiCollection
 import mtpy.core.mt as mt
 from mtpy.utils.decorator import deprecated
 from mtpy.utils.mtpylog import MtPyLog
 
+try:
+    # pyogrio writes a whole GeoDataFrame in one vectorized call
+    import pyogrio
+except ImportError:
+    pyogrio = None
+
+try:
+    # shapely 2 builds an array of polygons in one vectorized call
+    from shapely import polygons as shapely_polygons
+except ImportError:
+    shapely_polygons = None
+
 mpl.rcParams['lines.linewidth'] = 2
 # mpl.rcParams['lines.color'] = 'r'
 mpl.rcParams['figure.figsize'] = [10, 6]
 
 _logger = MtPyLog.get_mtpy_logger(__name__)  # logger inside this file/module
-_logger.setLevel(logging.DEBUG) # set your logger level
+
+# column types of the phase tensor csv files written by
+# EdiCollection.create_phase_tensor_csv, so read_csv need not infer them
+_PT_CSV_DTYPES = dict([('station', str)] +
+                      [(col, np.float64) for col in
+                       ('freq', 'lon', 'lat', 'phi_min', 'phi_max', 'azimuth',
+                        'skew', 'n_skew', 'elliptic', 'tip_mag_re', 'tip_mag_im',
+                        'tip_ang_re', 'tip_ang_im')])
+
+
+def read_pt_table(csvfile):
+    """
+    read a phase tensor table written by EdiCollection.create_phase_tensor_csv,
+    either a csv file or a (much faster to read) feather file
+    :param csvfile: path2csv or path2feather
+    :return: a pandas dataframe
+    """
+    if csvfile.endswith('.feather'):
+        return pd.read_feather(csvfile)
+    # round_trip parses the repr written floats back exactly, as feather stores them
+    return pd.read_csv(csvfile, dtype=_PT_CSV_DTYPES, engine='c', float_precision='round_trip')
+
+
+def write_shapefile(geopdf, path2shp):
+    """
+    write a geopandas dataframe into an ESRI shape file, using pyogrio when it
+    is installed and geopandas' (fiona) to_file otherwise
+    :param geopdf: a geopandas dataframe
+    :param path2shp: path2shp file
+    """
+    # pyogrio needs a pyproj CRS, older geopandas still carry a crs dict
+    if pyogrio is not None and hasattr(geopdf.crs, 'to_wkt'):
+        pyogrio.write_dataframe(geopdf, path2shp, driver='ESRI Shapefile')
+    else:
+        geopdf.to_file(path2shp, driver='ESRI Shapefile')
+
+
+def is_epsg(geopdf, epsg_code):
+    """
+    check whether a geopandas dataframe is already in the projection epsg_code,
+    in which case reprojecting it with to_crs can be skipped
+    :param geopdf: a geopandas dataframe
+    :param epsg_code: 4283 etc
+    :return: True or False
+    """
+    crs = geopdf.crs
+    if isinstance(crs, dict):
+        return crs.get('init', '').lower() == 'epsg:%s' % int(epsg_code)
+    elif hasattr(crs, 'to_epsg'):
+        return crs.to_epsg() == int(epsg_code)
+    return False
 
 
 class ShapeFilesCreator(EdiCollection):
@@ -105,45 +169,21 @@ class ShapeFilesCreator(EdiCollection):
 
         self._logger.debug(pdf['period'])
 
-        mt_locations = [Point(xy) for xy in zip(pdf['lon'], pdf['lat'])]
-        # OR pdf['geometry'] = pdf.apply(lambda z: Point(z.lon, z.lat), axis=1)
-        # if you want to df = df.drop(['Lon', 'Lat'], axis=1)
-        #orig_crs = {'init': 'epsg:4326'}  # initial crs WGS84
-        # orig_crs = {'init': 'epsg:4283'}  # initial crs GDA94
-
-        geopdf = gpd.GeoDataFrame(pdf, crs=self.orig_crs, geometry=mt_locations)
-
         # make  pt_ellispes using polygons
-        phi_max_v = geopdf['phi_max'].max()  # the max of this group of ellipse
+        phi_max_v = pdf['phi_max'].max()  # the max of this group of ellipse
 
         print(phi_max_v)
 
-        # points to trace out the polygon-ellipse
-
-        theta = np.arange(0, 2 * np.pi, np.pi / 30.)
-
-        azimuth = -np.deg2rad(geopdf['azimuth'])
-        width = ellipsize * (geopdf['phi_max'] / phi_max_v)
-        height = ellipsize * (geopdf['phi_min'] / phi_max_v)
-        x0 = geopdf['lon']
-        y0 = geopdf['lat']
-
-        # apply formula to generate ellipses
-
-        ellipse_list = []
-        for i in xrange(0, len(azimuth)):
-            x = x0[i] + height[i] * np.cos(theta) * np.cos(azimuth[i]) - \
-                width[i] * np.sin(theta) * np.sin(azimuth[i])
-            y = y0[i] + height[i] * np.cos(theta) * np.sin(azimuth[i]) + \
-                width[i] * np.sin(theta) * np.cos(azimuth[i])
-
-            polyg = Polygon(LinearRing([xy for xy in zip(x, y)]))
+        azimuth = -np.deg2rad(pdf['azimuth'].values)
+        width = ellipsize * (pdf['phi_max'].values / phi_max_v)
+        height = ellipsize * (pdf['phi_min'].values / phi_max_v)
 
-            # print polyg  # an ellispe
+        ellipse_list = get_ellipse_polygons(pdf['lon'].values, pdf['lat'].values,
+                                            width, height, azimuth)
 
-            ellipse_list.append(polyg)
-
-        geopdf = gpd.GeoDataFrame(geopdf, crs=self.orig_crs, geometry=ellipse_list)
+        #orig_crs = {'init': 'epsg:4326'}  # initial crs WGS84
+        # orig_crs = {'init': 'epsg:4283'}  # initial crs GDA94
+        geopdf = gpd.GeoDataFrame(pdf, crs=self.orig_crs, geometry=ellipse_list)
 
         if target_epsg_code is None:
             self._logger.info("The orginal Geopandas Dataframe CRS: %s", geopdf.crs)
@@ -151,7 +191,8 @@ class ShapeFilesCreator(EdiCollection):
             #raise Exception("Must provide a target_epsg_code")
             target_epsg_code= geopdf.crs['init'][5:]
         else:
-            geopdf.to_crs(epsg=target_epsg_code, inplace=True)
+            if not is_epsg(geopdf, target_epsg_code):
+                geopdf.to_crs(epsg=target_epsg_code, inplace=True)
             # world = world.to_crs({'init': 'epsg:3395'})
             # world.to_crs(epsg=3395) would also work
 
@@ -159,7 +200,7 @@ class ShapeFilesCreator(EdiCollection):
         shp_fname = 'Phase_Tensor_EPSG_%s_Period_%ss.shp' % (target_epsg_code, period)
         path2shp = os.path.join(self.outdir, shp_fname)
         self._logger.debug("To write to ESRI shp file %s", path2shp)
-        geopdf.to_file(path2shp, driver='ESRI Shapefile')
+        write_shapefile(geopdf, path2shp)
 
         self._logger.info("Geopandas Dataframe CRS: %s", geopdf.crs)
 
@@ -216,7 +257,8 @@ class ShapeFilesCreator(EdiCollection):
             # raise Exception("Must provide a target_epsg_code")
             target_epsg_code = geopdf.crs['init'][5:]
         else:
-            geopdf.to_crs(epsg=target_epsg_code, inplace=True)
+            if not is_epsg(geopdf, target_epsg_code):
+                geopdf.to_crs(epsg=target_epsg_code, inplace=True)
             # world = world.to_crs({'init': 'epsg:3395'})
             # world.to_crs(epsg=3395) would also work
 
@@ -224,7 +266,7 @@ class ShapeFilesCreator(EdiCollection):
         shp_fname = 'Tipper_Real_EPSG_%s_Period_%ss.shp' % (target_epsg_code, period)
         path2shp = os.path.join(self.outdir, shp_fname)
         self._logger.debug("To write to ESRI shp file %s", path2shp)
-        geopdf.to_file(path2shp, driver='ESRI Shapefile')
+        write_shapefile(geopdf, path2shp)
 
         self._logger.info("Geopandas Dataframe CRS: %s", geopdf.crs)
 
@@ -279,7 +321,8 @@ class ShapeFilesCreator(EdiCollection):
             # raise Exception("Must provide a target_epsg_code")
             target_epsg_code = geopdf.crs['init'][5:]
         else:
-            geopdf.to_crs(epsg=target_epsg_code, inplace=True)
+            if not is_epsg(geopdf, target_epsg_code):
+                geopdf.to_crs(epsg=target_epsg_code, inplace=True)
             # world = world.to_crs({'init': 'epsg:3395'})
             # world.to_crs(epsg=3395) would also work
 
@@ -287,7 +330,7 @@ class ShapeFilesCreator(EdiCollection):
         shp_fname = 'Tipper_Imag_EPSG_%s_Period_%ss.shp' % (target_epsg_code, period)
         path2shp = os.path.join(self.outdir, shp_fname)
         self._logger.debug("To write to ESRI shp file %s", path2shp)
-        geopdf.to_file(path2shp, driver='ESRI Shapefile')
+        write_shapefile(geopdf, path2shp)
 
         self._logger.info("Geopandas Dataframe CRS: %s", geopdf.crs)
 
@@ -308,6 +351,36 @@ class ShapeFilesCreator(EdiCollection):
 #   http://toblerity.org/shapely/manual.html#polygons
 #   https://geohackweek.github.io/vector/04-geopandas-intro/
 #===================================================================
+
+
+def get_ellipse_polygons(x0, y0, width, height, azimuth):
+    """
+    trace out ellipse polygons, the points of all ellipses are computed at once
+    :param x0, y0: arrays of the ellipse centres
+    :param width, height: arrays of the ellipse sizes along and across azimuth
+    :param azimuth: array of the ellipse rotations in radians
+    :return: shapely Polygons, one per ellipse
+    """
+    # points to trace out the polygon-ellipse
+    theta = np.arange(0, 2 * np.pi, np.pi / 30.)
+    cos_t = np.cos(theta)
+    sin_t = np.sin(theta)
+
+    # (number of ellipses, number of points) arrays
+    cos_a = np.cos(azimuth)[:, np.newaxis]
+    sin_a = np.sin(azimuth)[:, np.newaxis]
+    height = height[:, np.newaxis]
+    width = width[:, np.newaxis]
+    x = x0[:, np.newaxis] + height * cos_t * cos_a - width * sin_t * sin_a
+    y = y0[:, np.newaxis] + height * cos_t * sin_a + width * sin_t * cos_a
+
+    # (number of ellipses, number of points, 2) array of the polygon shells
+    coords = np.dstack((x, y))
+    if shapely_polygons is not None:
+        return shapely_polygons(coords)
+    return [Polygon(shell) for shell in coords]
+
+
 @deprecated("This function needs csv file as its input.")
 def create_ellipse_shp_from_csv(csvfile, esize=0.03, target_epsg_code=4283):
     """
@@ -319,54 +392,32 @@ def create_ellipse_shp_from_csv(csvfile, esize=0.03, target_epsg_code=4283):
     # crs = {'init': 'epsg:4326'}  # if assume initial crs WGS84
     crs = {'init': 'epsg:4283'}  # if assume initial crs GDA94
 
-    pdf = pd.read_csv(csvfile)
-    mt_locations = [Point(xy) for xy in zip(pdf['lon'], pdf['lat'])]
-    # OR pdf['geometry'] = pdf.apply(lambda z: Point(z.lon, z.lat), axis=1)
-    # if you want to df = df.drop(['Lon', 'Lat'], axis=1)
-
-    pdf = gpd.GeoDataFrame(pdf, crs=crs, geometry=mt_locations)
-
+    pdf = read_pt_table(csvfile)
     # make  pt_ellispes using polygons
     phi_max_v = pdf['phi_max'].max()  # the max of this group of ellipse
 
     print(phi_max_v)
 
-    # points to trace out the polygon-ellipse
-    theta = np.arange(0, 2 * np.pi, np.pi / 30.)
-
-    azimuth = -np.deg2rad(pdf['azimuth'])
-    width = esize * (pdf['phi_max'] / phi_max_v)
-    height = esize * (pdf['phi_min'] / phi_max_v)
-    x0 = pdf['lon']
-    y0 = pdf['lat']
-
-    # apply formula to generate ellipses
-
-    ellipse_list = []
-    for i in xrange(0, len(azimuth)):
-        x = x0[i] + height[i] * np.cos(theta) * np.cos(azimuth[i]) - \
-            width[i] * np.sin(theta) * np.sin(azimuth[i])
-        y = y0[i] + height[i] * np.cos(theta) * np.sin(azimuth[i]) + \
-            width[i] * np.sin(theta) * np.cos(azimuth[i])
-
-        polyg = Polygon(LinearRing([xy for xy in zip(x, y)]))
-
-        # print polyg  # an ellispe
+    azimuth = -np.deg2rad(pdf['azimuth'].values)
+    width = esize * (pdf['phi_max'].values / phi_max_v)
+    height = esize * (pdf['phi_min'].values / phi_max_v)
 
-        ellipse_list.append(polyg)
+    ellipse_list = get_ellipse_polygons(pdf['lon'].values, pdf['lat'].values,
+                                        width, height, azimuth)
 
     pdf = gpd.GeoDataFrame(pdf, crs=crs, geometry=ellipse_list)
 
     if target_epsg_code is None:
         raise Exception("Must provide a target_epsg_code")
     else:
-        pdf.to_crs(epsg=target_epsg_code, inplace=True)
+        if not is_epsg(pdf, target_epsg_code):
+            pdf.to_crs(epsg=target_epsg_code, inplace=True)
         # world = world.to_crs({'init': 'epsg:3395'})
         # world.to_crs(epsg=3395) would also work
 
     # to shape file
-    shp_fname = csvfile.replace('.csv', '_ellip_epsg%s.shp' % target_epsg_code)
-    pdf.to_file(shp_fname, driver='ESRI Shapefile')
+    shp_fname = os.path.splitext(csvfile)[0] + '_ellip_epsg%s.shp' % target_epsg_code
+    write_shapefile(pdf, shp_fname)
 
     return pdf
 
@@ -382,7 +433,7 @@ def create_tipper_real_shp_from_csv(csvfile, line_length=0.03, target_epsg_code=
     # crs = {'init': 'epsg:4326'}  # if assume initial crs WGS84
     crs = {'init': 'epsg:4283'}  # if assume initial crs GDA94
 
-    pdf = pd.read_csv(csvfile)
+    pdf = read_pt_table(csvfile)
     # mt_locations = [Point(xy) for xy in zip(pdf.lon, pdf.lat)]
     # OR pdf['geometry'] = pdf.apply(lambda z: Point(z.lon, z.lat), axis=1)
     # if you want to df = df.drop(['Lon', 'Lat'], axis=1)
@@ -401,13 +452,14 @@ def create_tipper_real_shp_from_csv(csvfile, line_length=0.03, target_epsg_code=
     if target_epsg_code is None:
         raise Exception("Must provide a target_epsg_code")
     else:
-        pdf.to_crs(epsg=target_epsg_code, inplace=True)
+        if not is_epsg(pdf, target_epsg_code):
+            pdf.to_crs(epsg=target_epsg_code, inplace=True)
         # world = world.to_crs({'init': 'epsg:3395'})
         # world.to_crs(epsg=3395) would also work
 
     # to shape file
-    shp_fname = csvfile.replace('.csv', '_real_epsg%s.shp' % target_epsg_code)
-    pdf.to_file(shp_fname, driver='ESRI Shapefile')
+    shp_fname = os.path.splitext(csvfile)[0] + '_real_epsg%s.shp' % target_epsg_code
+    write_shapefile(pdf, shp_fname)
 
     return pdf
 
@@ -423,7 +475,7 @@ def create_tipper_imag_shp_from_csv(csvfile, line_length=0.03, target_epsg_code=
     # crs = {'init': 'epsg:4326'}  # if assume initial crs WGS84
     crs = {'init': 'epsg:4283'}  # if assume initial crs GDA94
 
-    pdf = pd.read_csv(csvfile)
+    pdf = read_pt_table(csvfile)
     # mt_locations = [Point(xy) for xy in zip(pdf.lon, pdf.lat)]
     # OR pdf['geometry'] = pdf.apply(lambda z: Point(z.lon, z.lat), axis=1)
     # if you want to df = df.drop(['Lon', 'Lat'], axis=1)
@@ -442,17 +494,19 @@ def create_tipper_imag_shp_from_csv(csvfile, line_length=0.03, target_epsg_code=
     if target_epsg_code is None:
         raise Exception("Must provide a target_epsg_code")  # EDI original lat/lon epsg 4326 or GDA94
     else:
-        pdf.to_crs(epsg=target_epsg_code, inplace=True)
+        if not is_epsg(pdf, target_epsg_code):
+            pdf.to_crs(epsg=target_epsg_code, inplace=True)
         # world = world.to_crs({'init': 'epsg:3395'})
         # world.to_crs(epsg=3395) would also work
 
     # to shape file
-    shp_fname = csvfile.replace('.csv', '_imag_epsg%s.shp' % target_epsg_code)
-    pdf.to_file(shp_fname, driver='ESRI Shapefile')
+    shp_fname = os.path.splitext(csvfile)[0] + '_imag_epsg%s.shp' % target_epsg_code
+    write_shapefile(pdf, shp_fname)
 
     return pdf
 
-def export_geopdf_to_image(geopdf, bbox, jpg_file_name, target_epsg_code=None, colorby=None, colormap=None, showfig=False):
+def export_geopdf_to_image(geopdf, bbox, jpg_file_name, target_epsg_code=None, colorby=None, colormap=None, showfig=False,
+                           fig=None):
     """
     Export a geopandas dataframe to a jpe_file, with optionally a new epsg projection.
     :param geopdf: a geopandas dataframe
@@ -461,6 +515,8 @@ def export_geopdf_to_image(geopdf, bbox, jpg_file_name, target_epsg_code=None, c
     :param output jpg_file_name: path2jpeg
     :param target_epsg_code: 4326 etc
     :param showfig: If True, then display fig on screen.
+    :param fig: an existing matplotlib figure to clear and draw into, it is left open for the next image.
+                If None, a new figure is created and closed once saved.
     :return:
     """
 
@@ -468,6 +524,8 @@ def export_geopdf_to_image(geopdf, bbox, jpg_file_name, target_epsg_code=None, c
         p = geopdf
         #target_epsg_code = '4283'  # EDI orginal lat/lon epsg 4326=WGS84 or 4283=GDA94
         target_epsg_code = geopdf.crs['init'][5:]
+    elif is_epsg(geopdf, target_epsg_code):
+        p = geopdf
     else:
         p = geopdf.to_crs(epsg=target_epsg_code)
         # world = world.to_crs({'init': 'epsg:3395'})
@@ -490,17 +548,27 @@ def export_geopdf_to_image(geopdf, bbox, jpg_file_name, target_epsg_code=None, c
     else:
         my_colormap = colormap
 
-    if int(target_epsg_code) == 4326 or int(target_epsg_code) == 4283:
+    is_lonlat = int(target_epsg_code) == 4326 or int(target_epsg_code) == 4283
+    figsize = [10, 10] if is_lonlat else [10, 8]
+
+    own_fig = fig is None
+    if own_fig:
+        fig = plt.figure(figsize=figsize)
+    else:
+        # reusing a figure is much cheaper than building a new one per image
+        fig.clf()
+        fig.set_size_inches(figsize)
+    myax = fig.add_subplot(111)
 
-        myax = p.plot(figsize=[10, 10], linewidth=2.0, column=colorby, cmap=my_colormap)  # , marker='o', markersize=10)
+    if is_lonlat:
+
+        myax = p.plot(ax=myax, linewidth=2.0, column=colorby, cmap=my_colormap)  # , marker='o', markersize=10)
 
         # add colorbar
         divider = make_axes_locatable(myax)
         # pad = separation from figure to colorbar
         cax = divider.append_axes("right", size="3%", pad=0.2)
 
-        fig = myax.get_figure()
-
         sm = plt.cm.ScalarMappable(cmap=my_colormap)  # , norm=plt.Normalize(vmin=vmin, vmax=vmax))
         # fake up the array of the scalar mappable. Urgh...
         sm._A = p[colorby]  # [1,2,3]
@@ -532,7 +600,7 @@ def export_geopdf_to_image(geopdf, bbox, jpg_file_name, target_epsg_code=None, c
         myax.set_ylabel('Latitude')
         myax.set_title(fig_title)
     else:  # UTM kilometer units
-        myax = p.plot(figsize=[10, 8], linewidth=2.0, column=colorby,
+        myax = p.plot(ax=myax, linewidth=2.0, column=colorby,
                       cmap=my_colormap)  # simple plot need to have details added
 
         myax.set_xlabel('East-West (KM)')
@@ -561,8 +629,6 @@ def export_geopdf_to_image(geopdf, bbox, jpg_file_name, target_epsg_code=None, c
         # pad = separation from figure to colorbar
         cax = divider.append_axes("right", size="3%", pad=0.2)
 
-        fig = myax.get_figure()
-
         sm = plt.cm.ScalarMappable(cmap=my_colormap)  # , norm=plt.Normalize(vmin=vmin, vmax=vmax))
         # fake up the array of the scalar mappable. Urgh...
         sm._A = p[colorby]  # [1,2,3]
@@ -570,14 +636,14 @@ def export_geopdf_to_image(geopdf, bbox, jpg_file_name, target_epsg_code=None, c
         cb = fig.colorbar(sm, cax=cax, orientation='vertical')
         cb.set_label(colorby, fontdict={'size': 15, 'weight': 'bold'})
 
-    fig = plt.gcf()
     fig.savefig(jpg_file_name, dpi=400)
 
     if showfig is True:
         plt.show()
 
     # cleanup memory now
-    plt.close()  # this will make prog faster and not too many plot obj kept.
+    if own_fig:
+        plt.close(fig)  # this will make prog faster and not too many plot obj kept.
     del (p)
     del (geopdf)
     del (fig)
@@ -594,30 +660,58 @@ def process_csv_folder(csv_folder, bbox_dict, target_epsg_code=4283):
         _logger.critical("Must provide a csv folder")
 
     csvfiles = glob.glob(csv_folder + '/*Hz.csv')  # phase_tensor_tipper_0.004578Hz.csv
+    # prefer the feather files of create_phase_tensor_csv(file_format='feather'), they read much faster
+    for feather_file in glob.glob(csv_folder + '/*Hz.feather'):
+        csvfile = os.path.splitext(feather_file)[0] + '.csv'
+        if csvfile in csvfiles:
+            csvfiles.remove(csvfile)
+        csvfiles.append(feather_file)
 
     # filter the csv files if you do not want to plot all of them
     print(len(csvfiles))
 
-    # for acsv in csvfiles[:2]:
-    for acsv in csvfiles:
+    if len(csvfiles) < 1:
+        return
+
+    # each csv file is processed independently, spread them over processes
+    pool = multiprocessing.Pool(min(multiprocessing.cpu_count(), len(csvfiles)))
+    try:
+        pool.map(partial(_process_csv_file, bbox_dict=bbox_dict, target_epsg_code=target_epsg_code),
+                 csvfiles)
+    finally:
+        pool.close()
+        pool.join()
+
+    return
+
+
+def _process_csv_file(acsv, bbox_dict, target_epsg_code):
+    """
+    create the tipper and ellipse shape files and images of one csv file, see process_csv_folder
+    """
+    # the worker processes only save images
+    plt.switch_backend('Agg')
+
+    # one figure is redrawn for all the images of this csv file
+    fig = plt.figure()
+    try:
         tip_re_gdf = create_tipper_real_shp_from_csv(acsv, line_length=0.02, target_epsg_code=target_epsg_code)
         my_gdf = tip_re_gdf
-        jpg_file_name = acsv.replace('.csv', '_tip_re_epsg%s.jpg' % target_epsg_code)
-        export_geopdf_to_image(my_gdf, bbox_dict, jpg_file_name, target_epsg_code)
+        jpg_file_name = os.path.splitext(acsv)[0] + '_tip_re_epsg%s.jpg' % target_epsg_code
+        export_geopdf_to_image(my_gdf, bbox_dict, jpg_file_name, target_epsg_code, fig=fig)
 
         tip_im_gdf = create_tipper_imag_shp_from_csv(acsv, line_length=0.02, target_epsg_code=target_epsg_code)
         my_gdf = tip_im_gdf
-        jpg_file_name = acsv.replace('.csv', '_tip_im_epsg%s.jpg' % target_epsg_code)
-        export_geopdf_to_image(my_gdf, bbox_dict, jpg_file_name, target_epsg_code)
+        jpg_file_name = os.path.splitext(acsv)[0] + '_tip_im_epsg%s.jpg' % target_epsg_code
+        export_geopdf_to_image(my_gdf, bbox_dict, jpg_file_name, target_epsg_code, fig=fig)
 
         ellip_gdf = create_ellipse_shp_from_csv(acsv, esize=0.01, target_epsg_code=target_epsg_code)
         # Now, visualize and output to image file from the geopandas dataframe
         my_gdf = ellip_gdf
-        jpg_file_name = acsv.replace('.csv', '_ellips_epsg%s.jpg' % target_epsg_code)
-        export_geopdf_to_image(my_gdf, bbox_dict, jpg_file_name, target_epsg_code)
-
-
-    return
+        jpg_file_name = os.path.splitext(acsv)[0] + '_ellips_epsg%s.jpg' % target_epsg_code
+        export_geopdf_to_image(my_gdf, bbox_dict, jpg_file_name, target_epsg_code, fig=fig)
+    finally:
+        plt.close(fig)
 
 
 # ==================================================================
@@ -650,7 +744,7 @@ if __name__ == "__main__OLD_V0":
     print(bbox_dict)
 
     bbox_dict2 = shp_maker.bound_box_dict
-    print (bbox_dict2)
+    print(bbox_dict2)
     if bbox_dict != bbox_dict2:
         raise Exception("parent-child's attribute bbo_dic not equal!!!")
 
@@ -727,6 +821,7 @@ if __name__ == "__main__d":
               help='epsg code [3112, 4326, 4283, 32754, 32755, 28353, 28354, 28355]')
 @click.option('-o','--output',type=str,default="temp",help='Output directory')
 def generate_shape_files(input,output,code):
+    _logger.setLevel(logging.DEBUG) # set your logger level
     print("=======================================================================")
     print("Generating Shapes File requires following inputs edi files directory   ")
     print("Default epsg code 3112                                                 ")
@@ -21,10 +21,13 @@ else:
     plt.ion()
 
 import numpy as np
+import pandas as pd
+import pytest
 from geopandas import GeoDataFrame
 
 from mtpy.core.edi_collection import is_num_in_seq, EdiCollection
 from mtpy.core.mt import MT
+from mtpy.utils.shapefiles_creator import read_pt_table
 
 edi_paths = [
     #"../../data/edifiles",
@@ -129,6 +132,23 @@ class _BaseTest(object):
         path = make_temp_dir(self.__class__.__name__ + "_phase_tensor_csv", base_dir=self._temp_dir)
         self.edi_collection.create_phase_tensor_csv(path)
 
+    def test_create_phase_tensor_feather(self):
+        pytest.importorskip('pyarrow')
+        csv_path = make_temp_dir(self.__class__.__name__ + "_phase_tensor_csv_format", base_dir=self._temp_dir)
+        feather_path = make_temp_dir(self.__class__.__name__ + "_phase_tensor_feather", base_dir=self._temp_dir)
+        self.edi_collection.create_phase_tensor_csv(csv_path)
+        self.edi_collection.create_phase_tensor_csv(feather_path, file_format='feather')
+
+        # the feather tables read back the same as the csv ones
+        csv_files = sorted(glob.glob(os.path.join(csv_path, "*.csv")))
+        self.assertTrue(csv_files)
+        for csv_file in csv_files:
+            feather_file = os.path.join(feather_path,
+                                        os.path.splitext(os.path.basename(csv_file))[0] + '.feather')
+            self.assertTrue(os.path.isfile(feather_file))
+            pd.testing.assert_frame_equal(read_pt_table(feather_file), read_pt_table(csv_file),
+                                          check_exact=True)
+
     def test_create_phase_tensor_csv_with_image(self):
         path2 = make_temp_dir(self.__class__.__name__ + "_phase_tensor_csv_with_image", base_dir=self._temp_dir)
         self.edi_collection.create_phase_tensor_csv_with_image(path2)
@@ -0,0 +1,34 @@
+from unittest import TestCase
+
+import numpy as np
+
+import mtpy.modeling.modem.plot_slices as plot_slices
+from mtpy.modeling.modem.plot_slices import PlotSlices
+
+
+class TestGroupStations(TestCase):
+    """
+    the numba kernel and the numpy path of PlotSlices._group_stations must group the same way
+    """
+    def setUp(self):
+        self.grid = np.array([0., 10., 20., 30.])
+        # the first station is below the grid, the last is on its last line
+        self.location = np.array([-5., 12., 3., 15., 29., 30.])
+        self.value = np.array([0., 1., 2., 3., 4., 5.])
+        self.expected = {0.: [2.], 10.: [1., 3.], 20.: [4.], 30.: [5.]}
+        self._kernel_min = plot_slices._BIN_STATIONS_KERNEL_MIN
+
+    def tearDown(self):
+        plot_slices._BIN_STATIONS_KERNEL_MIN = self._kernel_min
+
+    def test_numpy(self):
+        groups = PlotSlices._group_stations(self.grid, self.location, self.value)
+        self.assertEqual(groups, self.expected)
+
+    def test_numba_kernel(self):
+        if plot_slices._bin_stations_kernel is None:
+            self.skipTest("numba is not installed")
+        # use the kernel on the few stations of this test
+        plot_slices._BIN_STATIONS_KERNEL_MIN = 0
+        groups = PlotSlices._group_stations(self.grid, self.location, self.value)
+        self.assertEqual(groups, self.expected)